@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the Duo base page parser.
+
+Compares the streaming DuoStreamPageParser (cold parse and unchanged page) with
+the previous BeautifulSoup implementation on pages holding 1 to 100 sessions.
+
+    python benchmarks/bench_parser.py
+"""
+import os
+import re
+import sys
+import timeit
+import types
+
+COMPONENT_DIR = os.path.join(os.path.dirname(__file__), "..", "custom_components", "DuoStream")
+
+# Import the integration modules without executing the Home Assistant package __init__
+package = types.ModuleType("duostream")
+package.__path__ = [COMPONENT_DIR]
+sys.modules.setdefault("duostream", package)
+
+from duostream.DuoStreamParser import DuoStreamPageParser, DuoStreamSession, parse_page  # noqa: E402
+
+def build_page(session_count: int) -> str:
+    rows = "".join(
+        f"""
+        <tr class="row">
+            <td class="status"><span class="dot {'on' if i % 2 else 'off'}"></span></td>
+            <td><a class="sunshine-link" href="https://192.168.1.20:{47990 + i * 10}" target="_blank">Session {i}</a></td>
+            <td>{1920 + i}x1080</td>
+            <td><button class="start" data-instance="Session {i}">Start</button></td>
+        </tr>"""
+        for i in range(session_count)
+    )
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Duo</title><link rel="stylesheet" href="/style.css"></head>
+<body>
+    <header><h1>Duo v1.5.2</h1></header>
+    <div class="info">
+        <div class="label"><img src="/host.svg" alt="Hostname"> GAMING-PC </div>
+        <div class="label"><img src="/cpu.svg" alt="CPU"> Ryzen 7 </div>
+    </div>
+    <table>
+        <thead><tr><th>Status</th><th>Name</th><th>Resolution</th><th></th></tr></thead>
+        <tbody>{rows}
+        </tbody>
+    </table>
+    <script>document.querySelectorAll('.start').forEach(b => b.onclick = () => fetch('/instances/' + b.dataset.instance + '/start'));</script>
+</body>
+</html>"""
+
+def parse_page_beautifulsoup(html_content: str):
+    """The BeautifulSoup implementation the streaming parser replaced."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    hostname_div = soup.select_one('.label img[alt="Hostname"]')
+    hostname = hostname_div.parent.get_text().strip() if hostname_div else "Unknown Hostname"
+    version_match = re.search(r'Duo v(\d+\.\d+\.\d+)', html_content)
+    version = version_match.group(1) if version_match else "Unknown"
+    sessions = []
+    for row in soup.select('tbody tr.row'):
+        link = row.select_one('a.sunshine-link')
+        if link:
+            sessions.append(DuoStreamSession(link.get_text().strip(), link.get('href')))
+    return hostname, version, sessions
+
+def bench(statement, number: int) -> float:
+    """Return the best time per call in microseconds."""
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+def main():
+    try:
+        import bs4  # noqa: F401
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+
+    print(f"{'sessions':>8} {'bytes':>8} {'streaming':>12} {'unchanged':>12} {'bs4':>12} {'speedup':>8}")
+    for session_count in (1, 5, 10, 25, 50, 100):
+        html = build_page(session_count)
+        raw = html.encode()
+        page = parse_page(html)
+        assert len(page.sessions) == session_count
+        assert page.hostname == "GAMING-PC" and page.version == "1.5.2"
+
+        number = max(10, 2000 // session_count)
+        streaming = bench(lambda: parse_page(html), number)
+        parser = DuoStreamPageParser()
+        parser.parse(raw)
+        unchanged = bench(lambda: parser.parse(raw), number * 10)
+
+        if has_bs4:
+            assert parse_page_beautifulsoup(html) == (page.hostname, page.version, list(page.sessions))
+            reference = bench(lambda: parse_page_beautifulsoup(html), number)
+            print(f"{session_count:>8} {len(raw):>8} {streaming:>10.1f}us {unchanged:>10.1f}us {reference:>10.1f}us {reference / streaming:>7.1f}x")
+        else:
+            print(f"{session_count:>8} {len(raw):>8} {streaming:>10.1f}us {unchanged:>10.1f}us {'n/a':>12} {'n/a':>8}")
+
+if __name__ == "__main__":
+    main()
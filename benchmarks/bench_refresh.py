@@ -0,0 +1,277 @@
+"""
+Load test of the DuoStream refresh path against local fake Duo servers.
+
+Every scenario starts one FakeDuoServer per host, points a DuoStreamDevice at
+each of them and runs refresh cycles on all hosts at once. When Home Assistant
+is installed the cycle goes through the coordinator and reads the state of
+every switch and sensor, otherwise it calls DuoStreamDevice.get_snapshot().
+The stub ping and ssh binaries of benchmarks/bin count subprocess spawns.
+
+Reported per scenario: HTTP requests and subprocess spawns per cycle, mean and
+max wall time per cycle, and peak Python memory. Baselines are stored in
+benchmarks/baseline.json, --compare exits non-zero on a regression.
+
+    python benchmarks/bench_refresh.py
+    python benchmarks/bench_refresh.py --sessions 8 100 --hosts 1 8 --latency 0.02
+    python benchmarks/bench_refresh.py --save-baseline
+    python benchmarks/bench_refresh.py --compare
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+COMPONENT_DIR = os.path.join(REPO_DIR, "custom_components", "DuoStream")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+sys.path.insert(0, BENCH_DIR)
+from fake_duo_server import FakeDuoServer  # noqa: E402
+
+def load_integration():
+    """Return the integration modules and whether the Home Assistant entity path is available."""
+    try:
+        import homeassistant  # noqa: F401
+    except ImportError:
+        # Device layer only, imported without executing the Home Assistant package __init__
+        package = types.ModuleType("duostream")
+        package.__path__ = [COMPONENT_DIR]
+        sys.modules.setdefault("duostream", package)
+        from duostream import DuoStreamDevice, DuoStreamFleet
+        return types.SimpleNamespace(device=DuoStreamDevice, fleet=DuoStreamFleet), False
+
+    sys.path.insert(0, REPO_DIR)
+    # The package __init__ rebinds the DuoStreamDevice name to the class, import the modules explicitly
+    modules = {
+        name: importlib.import_module(f"custom_components.DuoStream.{module}")
+        for name, module in (("device", "DuoStreamDevice"), ("fleet", "DuoStreamFleet"), ("coordinator", "coordinator"), ("switch", "switch"), ("sensor", "sensor"))
+    }
+    return types.SimpleNamespace(**modules), True
+
+class Host:
+    """One fake Duo server and the integration objects polling it."""
+
+    def __init__(self, modules, index: int, server: FakeDuoServer, cache_file: str, args, fleet=None):
+        config = modules.device.DuoStreamConfiguration()
+        config.duo_ip_address = "127.0.0.1"
+        config.duo_port = str(server.port)
+        config.duo_host_name = "bench"
+        config.duo_conf_name = f"bench_{index}"
+        config.cache_file = cache_file
+        config.cache_write_delay = 3600
+        # Polls are far apart in production, every cycle must probe the host
+        config.probe_ttl = 0
+        config.probe_method = args.probe
+        config.instance_status_timeout = args.request_timeout
+        config.base_page_timeout = args.request_timeout
+        config.status_batch_deadline = args.request_timeout * 2
+        self.server = server
+        self.config = config
+        self.device = modules.device.DuoStreamDevice(configuration=config, fleet=fleet)
+        self.coordinator = None
+        self.entities = []
+
+    def attach_entities(self, modules, hass):
+        self.coordinator = modules.coordinator.DuoStreamCoordinator(hass, self.device, self.config)
+
+    def build_entities(self, modules):
+        snapshot = self.coordinator.data
+        self.entities = [
+            modules.switch.DuoStreamSessionSwitch(self.coordinator, name, self.config) for name in snapshot.sessions
+        ] + [
+            modules.switch.DuoStreamSwitch(self.coordinator, self.config),
+            modules.sensor.DuoStreamServiceSensor(self.coordinator, self.config),
+            modules.sensor.DuoStreamSessionsSensor(self.coordinator, self.config),
+        ]
+
+    async def refresh(self):
+        if self.coordinator is None:
+            return await self.device.get_snapshot()
+        await self.coordinator.async_refresh()
+        for entity in self.entities:
+            entity.state
+            entity.extra_state_attributes
+
+def count_spawns(spawn_log: str) -> int:
+    if not os.path.exists(spawn_log):
+        return 0
+    with open(spawn_log) as f:
+        return sum(1 for _ in f)
+
+async def run_scenario(modules, with_entities: bool, sessions: int, hosts: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        spawn_log = os.path.join(directory, "spawns.log")
+        os.environ["DUOSTREAM_BENCH_SPAWN_LOG"] = spawn_log
+
+        servers = [
+            FakeDuoServer(sessions, args.latency, args.error_rate, args.timeout_rate, hang_time=args.request_timeout * 4, seed=index)
+            for index in range(hosts)
+        ]
+        for server in servers:
+            await server.start()
+        shared = modules.fleet.DuoStreamFleet() if args.fleet else None
+        fleet = [
+            Host(modules, index, server, os.path.join(directory, "cache.json"), args, shared)
+            for index, server in enumerate(servers)
+        ]
+
+        hass = None
+        if with_entities:
+            from homeassistant.core import HomeAssistant
+
+            hass = HomeAssistant(directory)
+            for host in fleet:
+                host.attach_entities(modules, hass)
+
+        durations = []
+        try:
+            # Warm-up cycle: connection setup, entities built from the first snapshot
+            await asyncio.gather(*(host.refresh() for host in fleet))
+            if with_entities:
+                for host in fleet:
+                    host.build_entities(modules)
+            requests_before = sum(server.total_requests for server in servers)
+            spawns_before = count_spawns(spawn_log)
+
+            for _ in range(args.cycles):
+                started = time.perf_counter()
+                await asyncio.gather(*(host.refresh() for host in fleet))
+                durations.append(time.perf_counter() - started)
+            requests = sum(server.total_requests for server in servers) - requests_before
+            spawns = count_spawns(spawn_log) - spawns_before
+
+            # Memory is traced on a separate cycle, tracing slows down the timed ones
+            tracemalloc.start()
+            try:
+                await asyncio.gather(*(host.refresh() for host in fleet))
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        finally:
+            for host in fleet:
+                await host.device.close()
+            if shared is not None:
+                await shared.close()
+            for server in servers:
+                await server.stop()
+            if hass is not None:
+                await hass.async_stop(force=True)
+
+        ssh_spawns = await run_ssh_commands(modules, directory, spawn_log, args) if args.ssh_commands else None
+        os.environ.pop("DUOSTREAM_BENCH_SPAWN_LOG", None)
+
+    return {
+        "requests_per_cycle": round(requests / args.cycles, 2),
+        "spawns_per_cycle": round(spawns / args.cycles, 2),
+        "mean_cycle_ms": round(sum(durations) / len(durations) * 1000, 2),
+        "max_cycle_ms": round(max(durations) * 1000, 2),
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+        **({"ssh_spawns_per_command": ssh_spawns} if ssh_spawns is not None else {}),
+    }
+
+async def run_ssh_commands(modules, directory: str, spawn_log: str, args) -> float:
+    """Spawns per service command, the persistent SSH connection is opened once."""
+    server = FakeDuoServer(1)
+    await server.start()
+    host = Host(modules, 0, server, os.path.join(directory, "cache.json"), args)
+    # The stub master creates its control socket file in the temporary directory
+    host.device._ssh._control_path = os.path.join(directory, "ssh-control")
+    spawns_before = count_spawns(spawn_log)
+    try:
+        for index in range(args.ssh_commands):
+            await host.device.activate_duo_stream_service(index % 2 == 0)
+    finally:
+        await host.device.close()
+        await server.stop()
+    return round((count_spawns(spawn_log) - spawns_before) / args.ssh_commands, 2)
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the regressions of the results against the baseline."""
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        # Request and spawn counts are deterministic, any increase is a regression
+        for metric in ("requests_per_cycle", "spawns_per_cycle", "ssh_spawns_per_command"):
+            if metric in metrics and metric in reference and metrics[metric] > reference[metric] + 0.01:
+                regressions.append(f"{key}: {metric} {reference[metric]} -> {metrics[metric]}")
+        for metric in ("mean_cycle_ms", "peak_memory_kb"):
+            if metric in reference and metrics[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {reference[metric]} -> {metrics[metric]}")
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32, 100])
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--request-timeout", type=float, default=0.5)
+    parser.add_argument("--probe", choices=("tcp", "icmp"), default="tcp")
+    parser.add_argument("--ssh-commands", type=int, default=10, help="service commands run per scenario, 0 to skip")
+    parser.add_argument("--fleet", action="store_true", help="hosts share one DuoStreamFleet, as in Home Assistant")
+    parser.add_argument("--device-only", action="store_true", help="skip the Home Assistant entity path")
+    parser.add_argument("--verbose", action="store_true", help="show the integration log")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative increase of time and memory")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    # Stub ping and ssh take precedence over the system ones
+    os.environ["PATH"] = os.path.join(BENCH_DIR, "bin") + os.pathsep + os.environ.get("PATH", "")
+
+    modules, with_entities = load_integration()
+    with_entities = with_entities and not args.device_only
+    path = "coordinator + entities" if with_entities else "device only"
+    if args.fleet:
+        path += " + fleet"
+    print(f"Refresh path: {path}, {args.cycles} cycles, {args.latency * 1000:.0f} ms latency, probe {args.probe}")
+    print(f"{'sessions':>8} {'hosts':>5} {'req/cycle':>10} {'spawn/cycle':>11} {'mean ms':>9} {'max ms':>9} {'peak KiB':>9} {'ssh spawn/cmd':>13}")
+
+    results = {}
+    for hosts in args.hosts:
+        for sessions in args.sessions:
+            metrics = await run_scenario(modules, with_entities, sessions, hosts, args)
+            key = f"{path}|{args.probe}|sessions={sessions}|hosts={hosts}"
+            results[key] = metrics
+            print(
+                f"{sessions:>8} {hosts:>5} {metrics['requests_per_cycle']:>10} {metrics['spawns_per_cycle']:>11} "
+                f"{metrics['mean_cycle_ms']:>9} {metrics['max_cycle_ms']:>9} {metrics['peak_memory_kb']:>9} "
+                f"{metrics.get('ssh_spawns_per_command', '-'):>13}"
+            )
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regression against the baseline")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_FILE}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+"""
+Startup benchmark of a DuoStream config entry.
+
+First measures, in a fresh interpreter, the device layer part of the startup:
+importing the device module, reading the session cache and building the
+cached snapshot.
+
+Then sets up a config entry in a Home Assistant instance, from a copy of the
+integration with a seeded cache, against a host that accepts connections and
+never answers. The switches and sensors must exist, unavailable, within the
+setup target: a setup waiting for the first refresh would hang on the host
+until the request timeout.
+
+Exits with a non-zero status when a target is missed.
+
+    python benchmarks/bench_startup.py [--sessions N] [--target-ms MS] [--setup-target-ms MS]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+COMPONENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "custom_components", "DuoStream"))
+
+STARTUP_TARGET_MS = 50.0
+# Well below base_page_timeout, the time a setup waiting on the host would take
+SETUP_TARGET_MS = 1000.0
+# Service switch and host sensors created besides the session switches
+HOST_ENTITIES = 6
+
+CHILD = """
+import sys, time, types
+# Already loaded by Home Assistant before any integration is set up
+import asyncio, dataclasses, json, logging
+started = time.perf_counter()
+package = types.ModuleType("duostream")
+package.__path__ = [{component_dir!r}]
+sys.modules["duostream"] = package
+from duostream.DuoStreamDevice import DuoStreamDevice, DuoStreamConfiguration
+imported = time.perf_counter()
+
+config = DuoStreamConfiguration()
+config.duo_ip_address = "192.0.2.1"  # TEST-NET-1, never answers
+config.duo_port = "5000"
+config.duo_conf_name = "bench"
+config.cache_file = {cache_file!r}
+device = DuoStreamDevice(configuration=config)
+device.read_cached_sessions()
+snapshot = device.get_cached_snapshot()
+ready = time.perf_counter()
+
+print(len(snapshot.sessions), (imported - started) * 1000, (ready - imported) * 1000, "httpx" in sys.modules)
+"""
+
+def write_cache(cache_file: str, sessions: int):
+    with open(cache_file, "w") as f:
+        json.dump({"bench": {
+            "timestamp": "2024-01-01T00:00:00",
+            "sessions": [{"name": f"Session {i}", "url": f"https://192.0.2.1:{47990 + i * 10}"} for i in range(sessions)]
+        }}, f)
+
+async def silent_host():
+    """TCP server accepting connections and never answering them."""
+    async def handle(reader, writer):
+        try:
+            await reader.read()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+async def setup_entry(config_dir: str) -> tuple:
+    """Set up a config entry against a silent host, return what existed once the setup returned."""
+    from homeassistant.core import CoreState, HomeAssistant
+    from homeassistant import loader
+    from homeassistant.config_entries import ConfigEntries, ConfigEntry
+    from homeassistant.helpers import (
+        area_registry, device_registry, entity, entity_registry, floor_registry,
+        issue_registry, label_registry, restore_state, translation,
+    )
+
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    entity.async_setup(hass)
+    loader.async_setup(hass)
+    translation.async_setup(hass)
+    for registry in (area_registry, device_registry, entity_registry, floor_registry, issue_registry, label_registry, restore_state):
+        await registry.async_load(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    hass.set_state(CoreState.running)
+
+    server = await silent_host()
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain="DuoStream",
+        title="bench",
+        data={
+            "configuration_name": "bench",
+            "duo_ip_address": "127.0.0.1",
+            "duo_port": str(server.sockets[0].getsockname()[1]),
+            "duo_host_name": "bench",
+            "mac_address": "",
+        },
+        source="user",
+        options={},
+    )
+    try:
+        started = time.perf_counter()
+        await hass.config_entries.async_add(entry)
+        setup_ms = (time.perf_counter() - started) * 1000
+        states = [
+            state for state in hass.states.async_all()
+            if state.domain in ("switch", "sensor") and state.entity_id.startswith(("switch.duostream_", "sensor.duostream_"))
+        ]
+        live = entry.duo_coordinator.data.live
+        await hass.config_entries.async_unload(entry.entry_id)
+    finally:
+        server.close()
+        await hass.async_stop(force=True)
+    return setup_ms, len(states), {state.state for state in states}, live
+
+def bench_setup(sessions: int) -> tuple:
+    with tempfile.TemporaryDirectory() as config_dir:
+        # A copy of the integration keeps its cache file out of the repository
+        component_dir = os.path.join(config_dir, "custom_components", "DuoStream")
+        shutil.copytree(COMPONENT_DIR, component_dir, ignore=shutil.ignore_patterns("__pycache__", "duostream_sessions_cache.json"))
+        write_cache(os.path.join(component_dir, "duostream_sessions_cache.json"), sessions)
+        sys.path.insert(0, config_dir)
+        try:
+            return asyncio.run(setup_entry(config_dir))
+        finally:
+            sys.path.remove(config_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=STARTUP_TARGET_MS)
+    parser.add_argument("--setup-target-ms", type=float, default=SETUP_TARGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, "duostream_sessions_cache.json")
+        write_cache(cache_file, args.sessions)
+
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD.format(component_dir=COMPONENT_DIR, cache_file=cache_file)],
+            check=True, capture_output=True, text=True
+        ).stdout.split()
+
+    sessions, import_ms, ready_ms, httpx_loaded = int(output[0]), float(output[1]), float(output[2]), output[3] == "True"
+    total_ms = import_ms + ready_ms
+    print(f"sessions from cache : {sessions}")
+    print(f"module import       : {import_ms:.1f} ms (httpx loaded: {httpx_loaded})")
+    print(f"cache to snapshot   : {ready_ms:.1f} ms")
+    print(f"total               : {total_ms:.1f} ms (target {args.target_ms:.0f} ms)")
+
+    setup_ms, entities, states, live = bench_setup(args.sessions)
+    print(f"config entry setup  : {setup_ms:.1f} ms (target {args.setup_target_ms:.0f} ms)")
+    print(f"entities created    : {entities}, states {sorted(states)}, refreshed {live}")
+
+    if sessions != args.sessions or total_ms > args.target_ms:
+        print("FAILED")
+        sys.exit(1)
+    if entities != args.sessions + HOST_ENTITIES or states != {"unavailable"} or live or setup_ms > args.setup_target_ms:
+        print("FAILED")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
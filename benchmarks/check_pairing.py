@@ -0,0 +1,87 @@
+"""
+Check DuoStreamDevice.append_new_device_pin against the fake Sunshine pairing API.
+
+Covers a successful pairing of one and of several sessions, rejected
+credentials, a PIN no client is waiting with, the overall deadline and a
+session without Sunshine URL. Exits non-zero on the first failed check.
+
+    python benchmarks/check_pairing.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPONENT_DIR = os.path.join(os.path.dirname(BENCH_DIR), "custom_components", "DuoStream")
+
+# Import the integration modules without executing the Home Assistant package __init__
+package = types.ModuleType("duostream")
+package.__path__ = [COMPONENT_DIR]
+sys.modules.setdefault("duostream", package)
+
+sys.path.insert(0, BENCH_DIR)
+from duostream.DuoStreamDevice import DuoStreamConfiguration, DuoStreamDevice  # noqa: E402
+from fake_duo_server import FakeDuoServer  # noqa: E402
+
+USER, PASSWORD = "admin", "secret"
+
+def check(name: str, condition: bool, detail=None):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        print(f"     {detail}")
+        sys.exit(1)
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    server = FakeDuoServer(3, sunshine_credentials=(USER, PASSWORD))
+    await server.start()
+    with tempfile.TemporaryDirectory() as directory:
+        config = DuoStreamConfiguration()
+        config.duo_ip_address = "127.0.0.1"
+        config.duo_port = str(server.port)
+        config.duo_conf_name = "pairing"
+        config.cache_file = os.path.join(directory, "cache.json")
+        config.sunshine_pair_timeout = 1.0
+        device = DuoStreamDevice(configuration=config)
+        try:
+            device.read_cached_sessions()
+            # Reads the Sunshine links of the sessions
+            await device.get_snapshot()
+
+            server.pending_pin = "1234"
+            results = await device.append_new_device_pin("Session 1", "1234", "tv", USER, PASSWORD)
+            check("one session paired", results == {"Session 1": None}, results)
+            check("client recorded by Sunshine", server.paired["Session 1"] == ["tv"], server.paired)
+
+            results = await device.append_new_device_pin(None, "1234", "laptop", USER, PASSWORD)
+            check("every session paired", results == dict.fromkeys(server.session_names), results)
+
+            results = await device.append_new_device_pin("Session 0", "1234", "tv", USER, "wrong")
+            check("401 reported", "rejected the credentials" in (results["Session 0"] or ""), results)
+
+            results = await device.append_new_device_pin("Session 0", "9999", "tv", USER, PASSWORD)
+            check("wrong PIN reported", "no pairing request" in (results["Session 0"] or ""), results)
+
+            results = await device.append_new_device_pin("Session 0", "12a", "tv", USER, PASSWORD)
+            check("invalid PIN refused", "Invalid PIN" in (results["Session 0"] or ""), results)
+
+            results = await device.append_new_device_pin("Session 9", "1234", "tv", USER, PASSWORD)
+            check("missing URL reported", "No Sunshine URL" in (results["Session 9"] or ""), results)
+
+            server.latency = config.sunshine_pair_timeout * 2
+            started = asyncio.get_running_loop().time()
+            results = await device.append_new_device_pin(["Session 0", "Session 2"], "1234", "tv", USER, PASSWORD)
+            elapsed = asyncio.get_running_loop().time() - started
+            # The request timeout equals the deadline, either may fire first
+            check("deadline reported", all(error is not None for error in results.values()), results)
+            check("deadline respected", elapsed < config.sunshine_pair_timeout + 0.5, f"{elapsed:.2f}s")
+        finally:
+            await device.close()
+            await server.stop()
+    print(f"Sunshine pin requests: {server.requests['sunshine_pin']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Check DuoStreamSshChannel against the stub ssh of benchmarks/bin.
+
+The stub creates the ControlPath socket file when a master connection is
+opened, answers "-O check" while that file is not emptied and records every
+spawn, which is enough to check that:
+
+- the master connection is opened once and reused by the following commands,
+- a master whose socket disappeared is reopened on the next command,
+- a stale socket, left by a previous run or a master that died, is removed
+  and the master reopened,
+- concurrent run() calls are serialised by the channel lock,
+- close() stops the master.
+
+Exits non-zero on the first failed check.
+
+    python benchmarks/check_ssh.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPONENT_DIR = os.path.join(os.path.dirname(BENCH_DIR), "custom_components", "DuoStream")
+
+# Import the integration modules without executing the Home Assistant package __init__
+package = types.ModuleType("duostream")
+package.__path__ = [COMPONENT_DIR]
+sys.modules.setdefault("duostream", package)
+
+from duostream.DuoStreamDevice import DuoStreamConfiguration  # noqa: E402
+from duostream.DuoStreamSsh import DuoStreamSshChannel  # noqa: E402
+
+def check(name: str, condition: bool, detail=None):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        print(f"     {detail}")
+        sys.exit(1)
+
+def read_spawns(spawn_log: str) -> list:
+    if not os.path.exists(spawn_log):
+        return []
+    with open(spawn_log) as f:
+        return f.read().splitlines()
+
+def masters(spawns: list) -> int:
+    return sum(1 for spawn in spawns if "ControlMaster=yes" in spawn)
+
+def commands(spawns: list) -> int:
+    return sum(1 for spawn in spawns if "ControlMaster=no" in spawn)
+
+class ProcessTracker:
+    """Wrap asyncio.create_subprocess_exec to record the most ssh processes ever running at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._create = asyncio.create_subprocess_exec
+
+    async def create_subprocess_exec(self, *args, **kwargs):
+        process = await self._create(*args, **kwargs)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        communicate = process.communicate
+
+        async def tracked_communicate(*communicate_args):
+            try:
+                # Give the other callers a chance to spawn while this process runs
+                await asyncio.sleep(0.01)
+                return await communicate(*communicate_args)
+            finally:
+                self.running -= 1
+
+        process.communicate = tracked_communicate
+        return process
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    # The stub ssh takes precedence over the system one
+    os.environ["PATH"] = os.path.join(BENCH_DIR, "bin") + os.pathsep + os.environ.get("PATH", "")
+
+    with tempfile.TemporaryDirectory() as directory:
+        spawn_log = os.path.join(directory, "spawns.log")
+        os.environ["DUOSTREAM_BENCH_SPAWN_LOG"] = spawn_log
+
+        config = DuoStreamConfiguration()
+        config.duo_ip_address = "127.0.0.1"
+        config.duo_host_name = "bench"
+        config.duo_conf_name = "ssh"
+        channel = DuoStreamSshChannel(config)
+        channel._control_path = os.path.join(directory, "control")
+
+        returncode, output, _ = await channel.run("net start | findstr /i Duo", 5)
+        check("command answered", returncode == 0 and output == "Duo", (returncode, output))
+        check("master opened on first use", os.path.exists(channel._control_path))
+
+        for _ in range(4):
+            await channel.run("net start | findstr /i Duo", 5)
+        spawns = read_spawns(spawn_log)
+        check("master reused", masters(spawns) == 1 and commands(spawns) == 5, spawns)
+
+        os.remove(channel._control_path)
+        await channel.run("net start | findstr /i Duo", 5)
+        spawns = read_spawns(spawn_log)
+        check("master reopened after its socket disappeared", masters(spawns) == 2, spawns)
+
+        # The master died, its socket file stays behind
+        open(channel._control_path, "w").close()
+        await channel.run("net start | findstr /i Duo", 5)
+        await channel.run("net start | findstr /i Duo", 5)
+        spawns = read_spawns(spawn_log)
+        check("master reopened after it died", masters(spawns) == 3, spawns)
+
+        # A new channel finds the socket of a previous run
+        open(channel._control_path, "w").close()
+        channel = DuoStreamSshChannel(config)
+        channel._control_path = os.path.join(directory, "control")
+        await channel.run("net start | findstr /i Duo", 5)
+        spawns = read_spawns(spawn_log)
+        check("stale socket of a previous run replaced", masters(spawns) == 4, spawns)
+        await channel.run("net start | findstr /i Duo", 5)
+        checks = sum(1 for spawn in read_spawns(spawn_log) if "-O check" in spawn)
+        check("running master checked once", checks == 2, checks)
+
+        tracker = ProcessTracker()
+        asyncio.create_subprocess_exec = tracker.create_subprocess_exec
+        try:
+            results = await asyncio.gather(*(channel.run("net start | findstr /i Duo", 5) for _ in range(8)))
+        finally:
+            asyncio.create_subprocess_exec = tracker._create
+        check("concurrent commands answered", all(result[0] == 0 for result in results), results)
+        check("concurrent commands serialised", tracker.max_running == 1, tracker.max_running)
+        check("no master opened for concurrent commands", masters(read_spawns(spawn_log)) == 4)
+
+        await channel.close()
+        check("master stopped on close", not os.path.exists(channel._control_path))
+        os.environ.pop("DUOSTREAM_BENCH_SPAWN_LOG", None)
+
+if __name__ == "__main__":
+    asyncio.run(main())
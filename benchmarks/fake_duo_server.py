@@ -0,0 +1,206 @@
+"""
+Local stand-in for the Duo web interface.
+
+Serves the base page with N `tr.row` sessions and the `/instances/<name>`,
+`/instances/<name>/start` and `/instances/<name>/stop` endpoints over HTTP/1.1
+keep-alive. Latency, errors and timeouts can be injected and every request is
+counted per endpoint.
+
+With Sunshine credentials, the session links point back at the server and
+`/sunshine/<index>/api/pin` stands in for the Sunshine pairing API of each
+session: basic authentication, and a PIN accepted only while it matches
+`pending_pin`.
+
+    python benchmarks/fake_duo_server.py --sessions 8 --port 5000
+    python benchmarks/fake_duo_server.py --sunshine-user admin --sunshine-password secret --pending-pin 1234
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+class FakeDuoServer:
+
+    def __init__(
+        self,
+        sessions: int = 8,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_time: float = 60.0,
+        seed: Optional[int] = 0,
+        sunshine_credentials: Optional[Tuple[str, str]] = None,
+    ):
+        """
+        Args:
+            sessions (int): Number of Duo instances listed on the base page
+            latency (float): Seconds added before every response
+            error_rate (float): Fraction of requests answered with a 500 error
+            timeout_rate (float): Fraction of requests left unanswered for `hang_time` seconds
+            seed (int): Seed of the error and timeout draws, None for a random one
+            sunshine_credentials (tuple): User and password of the fake Sunshine API, None to link to real ports
+        """
+        self.session_names = [f"Session {i}" for i in range(sessions)]
+        self.running = set(self.session_names[::2])
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_time = hang_time
+        self.requests = Counter()
+        self.connections = 0
+        self.sunshine_credentials = sunshine_credentials
+        # PIN of the client waiting to be paired, None when no client is waiting
+        self.pending_pin: Optional[str] = None
+        self.paired: Dict[str, List[str]] = {name: [] for name in self.session_names}
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.base_events.Server] = None
+        self.port = 0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def sunshine_url(self, index: int) -> str:
+        if self.sunshine_credentials is not None:
+            return f"http://127.0.0.1:{self.port}/sunshine/{index}"
+        return f"https://127.0.0.1:{47990 + index * 10}"
+
+    def base_page(self) -> str:
+        rows = "".join(
+            f"""
+            <tr class="row">
+                <td class="status"><span class="dot {'on' if name in self.running else 'off'}"></span></td>
+                <td><a class="sunshine-link" href="{self.sunshine_url(i)}" target="_blank">{name}</a></td>
+                <td>1920x1080</td>
+            </tr>"""
+            for i, name in enumerate(self.session_names)
+        )
+        return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Duo</title></head>
+<body>
+    <header><h1>Duo v1.5.2</h1></header>
+    <div class="label"><img src="/host.svg" alt="Hostname"> FAKE-DUO </div>
+    <table><tbody>{rows}
+    </tbody></table>
+</body>
+</html>"""
+
+    def _pair(self, index: str, headers: Dict[str, str], body: bytes):
+        if self.sunshine_credentials is None or not index.isdigit() or int(index) >= len(self.session_names):
+            self.requests["not_found"] += 1
+            return 404, "not found"
+        self.requests["sunshine_pin"] += 1
+        expected = "Basic " + base64.b64encode(":".join(self.sunshine_credentials).encode()).decode()
+        if headers.get("authorization") != expected:
+            return 401, "unauthorized"
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return 400, "bad request"
+        accepted = self.pending_pin is not None and request.get("pin") == self.pending_pin
+        if accepted:
+            self.paired[self.session_names[int(index)]].append(request.get("name", ""))
+        return 200, json.dumps({"status": accepted})
+
+    def _route(self, path: str, method: str = "GET", headers: Optional[Dict[str, str]] = None, body: bytes = b""):
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        if len(parts) == 4 and parts[0] == "sunshine" and parts[2:] == ["api", "pin"] and method == "POST":
+            return self._pair(parts[1], headers or {}, body)
+        if not parts:
+            self.requests["base_page"] += 1
+            return 200, self.base_page()
+        if parts[0] != "instances" or len(parts) < 2 or parts[1] not in self.session_names:
+            self.requests["not_found"] += 1
+            return 404, "not found"
+        name = parts[1]
+        if len(parts) == 2:
+            self.requests["instance_status"] += 1
+            return 200, "true" if name in self.running else "false"
+        if parts[2] == "start":
+            self.requests["instance_start"] += 1
+            self.running.add(name)
+            return 200, "ok"
+        if parts[2] == "stop":
+            self.requests["instance_stop"] += 1
+            self.running.discard(name)
+            return 200, "ok"
+        self.requests["not_found"] += 1
+        return 404, "not found"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                draw = self._random.random()
+                if draw < self.timeout_rate:
+                    self.requests["timeout"] += 1
+                    await asyncio.sleep(self.hang_time)
+                    break
+                if draw < self.timeout_rate + self.error_rate:
+                    self.requests["error"] += 1
+                    status, response = 500, "error"
+                else:
+                    method, path = request_line.decode().split()[:2]
+                    status, response = self._route(path, method, headers, body)
+
+                payload = response.encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: text/html\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--sunshine-user")
+    parser.add_argument("--sunshine-password")
+    parser.add_argument("--pending-pin", help="PIN accepted by the fake Sunshine pairing API")
+    args = parser.parse_args()
+
+    credentials = (args.sunshine_user, args.sunshine_password) if args.sunshine_user else None
+    server = FakeDuoServer(args.sessions, args.latency, args.error_rate, args.timeout_rate, seed=None, sunshine_credentials=credentials)
+    server.pending_pin = args.pending_pin
+    await server.start(port=args.port)
+    print(f"Fake Duo server with {args.sessions} sessions on http://127.0.0.1:{server.port}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+CACHE_FORMAT_VERSION = 1
+
+class DuoStreamCacheStore:
+    """
+    Session cache records of every configuration, kept in one JSON file.
+
+    A single store is shared by all the configurations using the same file, so
+    concurrent writers never clobber each other's record. The file is loaded
+    lazily on first access and every write atomically replaces it, a crash in
+    the middle of a write leaves the previous file untouched.
+
+    The methods do blocking file I/O, run them in an executor.
+    """
+
+    _stores: Dict[str, "DuoStreamCacheStore"] = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, path: str, logger):
+        self._path = path
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._records: Optional[Dict[str, dict]] = None
+
+    @classmethod
+    def for_file(cls, path: str, logger) -> "DuoStreamCacheStore":
+        """Return the store shared by every configuration using this cache file."""
+        path = os.path.abspath(path)
+        with cls._stores_lock:
+            store = cls._stores.get(path)
+            if store is None:
+                store = cls._stores[path] = cls(path, logger)
+            return store
+
+    def _load(self) -> Dict[str, dict]:
+        if self._records is not None:
+            return self._records
+        self._records = {}
+        try:
+            if os.path.exists(self._path):
+                with open(self._path, 'r') as f:
+                    cache_data = json.load(f)
+                if "version" in cache_data:
+                    if cache_data["version"] == CACHE_FORMAT_VERSION:
+                        self._records = cache_data.get("configurations", {})
+                    else:
+                        self._logger.warning(f"Ignoring cache file with unknown format version {cache_data['version']}")
+                else:
+                    # Files written before the format was versioned hold the records at the top level
+                    self._records = {
+                        name: record for name, record in cache_data.items()
+                        if isinstance(record, dict) and 'sessions' in record
+                    }
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            self._logger.error(f"Cache read error: {e}")
+        return self._records
+
+    def read(self, conf_name: str) -> Optional[dict]:
+        """Return the record of a configuration, None if there is none."""
+        with self._lock:
+            return self._load().get(conf_name)
+
+    def write(self, conf_name: str, record: dict):
+        """Store the record of a configuration and atomically rewrite the file."""
+        self.write_many({conf_name: record})
+
+    def write_many(self, records: Dict[str, dict]):
+        """Store the records of several configurations with a single rewrite of the file."""
+        with self._lock:
+            stored = self._load()
+            stored.update(records)
+            self._save(stored)
+
+    def _save(self, records: Dict[str, dict]):
+        directory = os.path.dirname(self._path)
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".duostream_cache.", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({"version": CACHE_FORMAT_VERSION, "configurations": records}, f, separators=(",", ":"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self._path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            self._logger.error(f"Cache write error: {e}")
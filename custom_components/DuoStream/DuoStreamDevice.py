@@ -1,15 +1,33 @@
-from bs4 import BeautifulSoup
-import re
 import logging
-import subprocess
-import json
+import math
 import os
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-import httpx
+import re
+import socket
+from typing import Awaitable, Callable, List, Dict, Optional, Mapping, Tuple, TypeVar, Union, TYPE_CHECKING
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
 import asyncio
+import time
+from contextlib import nullcontext
+
+from .DuoStreamSsh import DuoStreamSshChannel
+from .DuoStreamParser import DuoStreamPage, DuoStreamPageParser, DuoStreamSession
+from .DuoStreamCache import DuoStreamCacheStore
+from .DuoStreamStats import DuoStreamStats
+from .DuoStreamHistory import DuoStreamSessionHistory
+from .DuoStreamResilience import DuoStreamSingleFlight, DuoStreamCircuitBreaker, DuoStreamCircuitOpenError
+
+if TYPE_CHECKING:
+    import httpx
+    from .DuoStreamFleet import DuoStreamFleet
 
 COMMAND_TIMEOUT = 10
+# Exit status of ssh when it could not connect or authenticate
+SSH_CONNECTION_FAILED = 255
+
+T = TypeVar("T")
 
 class DuoStreamConfiguration:
     def __init__(self):
@@ -20,12 +38,281 @@ class DuoStreamConfiguration:
         self.cache_file: str = os.path.join(os.path.dirname(__file__),"duostream_sessions_cache.json")
         self.duo_conf_name: str = ""
         self.cache_expiration_hours: int = -1  # Cache valable 24h
+        self.cache_write_delay: float = 10.0  # Session changes are written after this quiet period
         self.logger = logging.getLogger(__name__)
+        # HTTP connection pool shared by every request sent to the Duo web interface,
+        # a device in a fleet uses the pool of the fleet and its limits instead
+        self.http_max_connections: int = 10
+        self.http_max_keepalive_connections: int = 5
+        self.http_keepalive_expiry: float = 30.0
+        # Per-endpoint timeouts in seconds
+        self.base_page_timeout: float = COMMAND_TIMEOUT
+        self.instance_status_timeout: float = 5.0
+        self.instance_command_timeout: float = COMMAND_TIMEOUT
+        # Fan-out of the per-session instance queries
+        self.max_concurrent_requests: int = 4
+        self.status_batch_deadline: float = COMMAND_TIMEOUT
+        # Waiting for a command to take effect
+        self.confirm_timeout: float = 30.0
+        self.confirm_interval: float = 1.0
+        # Circuit breaker: fail fast after this many consecutive failures, retry after the reset timeout
+        self.breaker_failure_threshold: int = 3
+        self.breaker_reset_timeout: float = 30.0
+        # Reachability probe: "tcp" connects to duo_port, "icmp" runs the ping command
+        self.probe_method: str = "tcp"
+        self.probe_timeout: float = 2.0
+        self.probe_ttl: float = 5.0  # Callers within this window share the last probe result
+        # SSH: reuse one authenticated connection for every service command
+        self.ssh_persistent: bool = True
+        self.ssh_persist_seconds: int = 600  # Idle time before the shared connection is closed
+        self.ssh_connect_timeout: float = COMMAND_TIMEOUT
+        # Cold start: Wake-on-LAN, then a tight probe loop until the host, the service and the session are up
+        self.wol_broadcast_address: str = "255.255.255.255"
+        self.wol_port: int = 9
+        self.wol_resend_interval: float = 5.0  # Magic packets can be lost, resend while the host is down
+        self.wake_probe_interval: float = 0.5
+        self.wake_probe_timeout: float = 1.0
+        self.cold_start_timeout: float = 180.0
+        # Health of the Sunshine endpoint of every running session, probed far less often than the main poll
+        self.sunshine_probe_interval: float = 300.0
+        self.sunshine_probe_timeout: float = 3.0
+        # Pairing a Moonlight client: PIN requests sent to the Sunshine API of the sessions, bounded by an overall deadline
+        self.sunshine_pair_timeout: float = 30.0
+        # Session transitions and command latencies kept in memory and in the cache
+        self.history_capacity: int = 512
+
+@dataclass(frozen=True, slots=True)
+class DuoStreamSnapshot:
+    """
+    Immutable state of a DuoStream host taken during one refresh cycle.
+
+    Two snapshots compare equal when the state of the host is the same,
+    whenever it was taken. The revision is bumped by the device only when the
+    state differs from the previous snapshot, so readers holding an older
+    snapshot detect an unchanged refresh by comparing two integers.
+    """
+    host_online: bool = False
+    service_running: bool = False
+    sessions: Tuple[str, ...] = ()
+    instances: Mapping[str, bool] = field(default_factory=lambda: MappingProxyType({}))
+    hostname: str = "Unknown Hostname"
+    version: str = "Unknown"
+    circuit_state: str = DuoStreamCircuitBreaker.CLOSED
+    # False for the snapshot built from the cache at startup, the host has not been probed yet
+    live: bool = True
+    fetched_at: float = field(default=0.0, compare=False)  # time.time() of the refresh
+    revision: int = field(default=0, compare=False)
+
+    def session_status(self, session_name: str) -> bool:
+        return self.instances.get(session_name, False)
+
+@dataclass(frozen=True, slots=True)
+class DuoStreamSessionList:
+    """Sessions of a host and the time they were read from the base page, the cached part of the state."""
+    sessions: Tuple[DuoStreamSession, ...] = ()
+    names: Tuple[str, ...] = ()
+    fetched_at: Optional[float] = None  # time.time() of the fetch, None if unknown
+
+    @classmethod
+    def from_page(cls, page: DuoStreamPage, fetched_at: float) -> "DuoStreamSessionList":
+        # The page already holds the names, they are shared instead of rebuilt
+        return cls(page.sessions, page.session_names, fetched_at)
+
+    def as_record(self) -> dict:
+        """Cache record of the sessions, the timestamp is stored as epoch seconds."""
+        return {
+            "timestamp": self.fetched_at,
+            "sessions": [{"name": session.name, "url": session.url} for session in self.sessions],
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> Optional["DuoStreamSessionList"]:
+        """Rebuild the sessions of a cache record, None if the record is damaged."""
+        timestamp = record.get("timestamp")
+        fetched_at = None
+        if isinstance(timestamp, (int, float)):
+            fetched_at = float(timestamp)
+        elif isinstance(timestamp, str):
+            # Records written by older versions hold an ISO timestamp in local time
+            try:
+                fetched_at = datetime.fromisoformat(timestamp).timestamp()
+            except ValueError:
+                pass
+        try:
+            sessions = tuple(DuoStreamSession(session["name"], session.get("url")) for session in record["sessions"])
+        except (KeyError, TypeError, AttributeError):
+            return None
+        return cls(sessions, tuple(session.name for session in sessions), fetched_at)
+
+@dataclass(frozen=True)
+class DuoStreamEndpointHealth:
+    """Result of the last probe of the Sunshine endpoint of a session."""
+    responsive: bool
+    latency_ms: Optional[float] = None
+    status_code: Optional[int] = None
+    checked_at: float = 0.0  # time.time() of the probe
+
+@dataclass
+class DuoStreamColdStartResult:
+    """Outcome of a cold start: the seconds spent in each stage and, on failure, the stage that failed."""
+    session_name: str
+    success: bool = False
+    stage: str = ""
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def total(self) -> float:
+        return round(sum(self.timings.values()), 3)
+
+    def as_dict(self) -> dict:
+        return {
+            "session": self.session_name,
+            "success": self.success,
+            "stage": self.stage,
+            "timings": dict(self.timings),
+            "total": self.total,
+            "error": self.error,
+        }
+
+def parse_mac_address(mac_address: str) -> bytes:
+    """
+    Args:
+        mac_address (str): MAC address with or without ':', '-' or '.' separators
+
+    Returns:
+        bytes: The 6 bytes of the address, ValueError is raised if it is not valid
+    """
+    digits = re.sub(r"[:\-.\s]", "", mac_address or "")
+    if len(digits) != 12:
+        raise ValueError(f"Invalid MAC address: '{mac_address}'")
+    return bytes.fromhex(digits)
 
 class DuoStreamDevice:
-    def __init__(self, configuration: DuoStreamConfiguration):
+    def __init__(self, configuration: DuoStreamConfiguration, fleet: Optional["DuoStreamFleet"] = None):
+        """
+        Args:
+            configuration (DuoStreamConfiguration): Host settings
+            fleet (DuoStreamFleet): Resources shared with the other hosts, the device owns its own when omitted
+        """
         self._configuration = configuration
-        self._sessions = None
+        self._fleet = fleet
+        self._base_url = f"http://{configuration.duo_ip_address}:{configuration.duo_port}"
+        self._sessions: Optional[DuoStreamSessionList] = None
+        self._snapshot: Optional[DuoStreamSnapshot] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._power_status: Optional[bool] = None
+        self._power_status_time: float = 0.0
+        # Global limits of the fleet, a standalone device is only bounded by its single-flight
+        self._probe_limiter = fleet.probe_limiter if fleet is not None else nullcontext()
+        self._subprocess_limiter = fleet.subprocess_limiter if fleet is not None else nullcontext()
+        self._ssh = DuoStreamSshChannel(configuration, self._subprocess_limiter)
+        self._page_parser = DuoStreamPageParser()
+        self._page = DuoStreamPage()
+        self._sunshine_health: Dict[str, DuoStreamEndpointHealth] = {}
+        self._history = DuoStreamSessionHistory(configuration.history_capacity)
+        self._unanswered_sessions: set = set()
+        self._cache_store = DuoStreamCacheStore.for_file(configuration.cache_file, configuration.logger)
+        self._cache_write_handle: Optional[asyncio.TimerHandle] = None
+        # Concurrent callers of the same query share one in-flight operation
+        self._single_flight = DuoStreamSingleFlight()
+        self._stats = DuoStreamStats()
+        # The host breaker only trips on probe and SSH failures, a computer whose Duo service
+        # is stopped stays online. The service breaker only trips on web interface timeouts
+        self._host_breaker = DuoStreamCircuitBreaker(
+            configuration.breaker_failure_threshold,
+            configuration.breaker_reset_timeout
+        )
+        self._service_breaker = DuoStreamCircuitBreaker(
+            configuration.breaker_failure_threshold,
+            configuration.breaker_reset_timeout
+        )
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Return the pooled HTTP client of the fleet, or the one of the device created on first use."""
+        if self._fleet is not None:
+            return self._fleet.get_client()
+
+        # Imported on first request so that loading the integration stays cheap
+        import httpx
+
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                verify=False,
+                limits=httpx.Limits(
+                    max_connections=self._configuration.http_max_connections,
+                    max_keepalive_connections=self._configuration.http_max_keepalive_connections,
+                    keepalive_expiry=self._configuration.http_keepalive_expiry,
+                ),
+            )
+        return self._client
+
+    @property
+    def stats(self) -> DuoStreamStats:
+        """Counters and latency histograms of the I/O done with the host."""
+        return self._stats
+
+    @property
+    def history(self) -> DuoStreamSessionHistory:
+        """Session transitions and command latencies of the host."""
+        return self._history
+
+    @property
+    def sunshine_health(self) -> Mapping[str, DuoStreamEndpointHealth]:
+        """Last Sunshine endpoint probe of each running session, by session name."""
+        return MappingProxyType(self._sunshine_health)
+
+    @property
+    def circuit_state(self) -> str:
+        """State of the circuit breaker of the host: closed, open or half_open."""
+        return self._host_breaker.state
+
+    @property
+    def service_circuit_state(self) -> str:
+        """State of the circuit breaker of the Duo web interface: closed, open or half_open."""
+        return self._service_breaker.state
+
+    async def _request(self, path: str, timeout: float) -> "httpx.Response":
+        """
+        Send a GET request to the Duo web interface through the service circuit breaker.
+
+        A refused connection only means the service is stopped and fails fast on
+        its own, only timeouts of a hung web interface count as failures.
+        """
+        import httpx
+
+        return await self._service_breaker.call(
+            lambda: self._get_client().get(f"{self._base_url}{path}", timeout=timeout),
+            failure_exceptions=(httpx.TimeoutException,)
+        )
+
+    async def _run_ssh(self, command: str, timeout: float):
+        """
+        Run a command on the host through the host circuit breaker.
+
+        Only an SSH connection failure (exit status 255) counts as a failure, a
+        slow command on a reachable host must not mark it offline.
+        """
+        with self._stats.measure("ssh_command"):
+            return await self._host_breaker.call(
+                lambda: self._ssh.run(command, timeout),
+                failed=lambda result: result[0] == SSH_CONNECTION_FAILED
+            )
+
+    async def close(self):
+        """Close the pooled HTTP client and the SSH connection, a client shared by the fleet is left open."""
+        # Refreshes still running would outlive the config entry
+        self._single_flight.cancel_all()
+        # The pending write is superseded by the one done on unload
+        if self._cache_write_handle is not None:
+            self._cache_write_handle.cancel()
+            self._cache_write_handle = None
+        if self._fleet is not None:
+            self._fleet.cancel_cache_write(self._cache_store, self._configuration.duo_conf_name)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        await self._ssh.close()
 
     async def _check_device_online(self) -> bool:
         """Check if the device is powered on and reachable."""
@@ -39,62 +326,107 @@ class DuoStreamDevice:
         """Fill the loaded cache and read cache"""
         return self._read_session_cache()
 
-    def _read_session_cache(self) -> Optional[Dict]:
-        """Read sessions from cache file."""
-        try:
-            self._sessions = {
-                        'timestamp' : datetime.now().isoformat(),
-                        'sessions' : {}
-            }
-            if os.path.exists(self._configuration.cache_file):
-                with open(self._configuration.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                    self._sessions = cache_data.get(self._configuration.duo_conf_name,self._sessions)
-                    # Check cache expiration
-                    cached_time = datetime.fromisoformat( self._sessions.get('timestamp', ''))
-                    if self._configuration.cache_expiration_hours == -1 or (datetime.now() - cached_time < timedelta(hours=self._configuration.cache_expiration_hours)):
-                        return self._sessions
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            self._configuration.logger.error(f"Cache read error: {e}")
-        return None
+    def _read_session_cache(self) -> Optional[DuoStreamSessionList]:
+        """Read sessions from cache file, an expired record is treated as missing."""
+        self._sessions = DuoStreamSessionList(fetched_at=time.time())
+        with self._stats.measure("cache_read"):
+            cached = self._cache_store.read(self._configuration.duo_conf_name)
+        if cached is None or 'sessions' not in cached:
+            return None
+        # The usage history does not expire with the session list
+        self._history = DuoStreamSessionHistory.from_record(cached.get('history'), self._configuration.history_capacity)
+        sessions = DuoStreamSessionList.from_record(cached)
+        if sessions is None:
+            return None
+        # Check cache expiration
+        if self._configuration.cache_expiration_hours != -1:
+            if sessions.fetched_at is None:
+                return None
+            if time.time() - sessions.fetched_at >= self._configuration.cache_expiration_hours * 3600:
+                return None
+        self._sessions = sessions
+        return self._sessions
 
-    def _write_session_cache(self, sessions_cache: Dict):
+    def _cache_record(self) -> Optional[Dict]:
+        """Return the cache record of the configuration: the sessions and the usage history."""
+        if self._sessions is None:
+            return None
+        return {**self._sessions.as_record(), 'history': self._history.as_record()}
+
+    def _write_session_cache(self, sessions_cache: Optional[Dict]):
         """Write sessions to cache file."""
-        try:
-            cache_data = {}
-            if os.path.exists(self._configuration.cache_file):
-                with open(self._configuration.cache_file, 'r') as f:
-                        cache_data = json.load(f)
-            cache_data[self._configuration.duo_conf_name] = sessions_cache
-            with open(self._configuration.cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=4)
-        except Exception as e:
-            self._configuration.logger.error(f"Cache write error: {e}")
+        if sessions_cache is not None:
+            with self._stats.measure("cache_write"):
+                self._cache_store.write(self._configuration.duo_conf_name, sessions_cache)
+
+    def _schedule_session_cache_write(self):
+        """Write the cache once the session set stopped changing for `cache_write_delay` seconds."""
+        if self._fleet is not None:
+            # The fleet batches the records of every host in one write
+            self._fleet.schedule_cache_write(
+                self._cache_store,
+                self._configuration.duo_conf_name,
+                self._cache_record,
+                self._configuration.cache_write_delay,
+                self._stats
+            )
+            return
+        if self._cache_write_handle is not None:
+            self._cache_write_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._cache_write_handle = loop.call_later(
+            self._configuration.cache_write_delay,
+            self._write_session_cache_in_executor
+        )
+
+    def _write_session_cache_in_executor(self):
+        self._cache_write_handle = None
+        asyncio.get_running_loop().run_in_executor(None, self.write_session_cache)
 
     def write_session_cache(self):
         """Write sessions to cache file."""
-        self._write_session_cache(self._sessions)
+        self._write_session_cache(self._cache_record())
+
+    def record_session_command(self, session_name: str, new_status: bool, seconds: float):
+        """
+        Add the time a confirmed start or stop command took to the usage history.
+
+        Args:
+            session_name (str): Session the command was sent to
+            new_status (bool): True for a start, False for a stop command
+            seconds (float): Time from the command to the confirmation by the host
+        """
+        self._history.record_command(session_name, new_status, seconds)
+        self._schedule_session_cache_write()
 
-    async def _get_html_page_base(self) -> dict:
+    async def _get_html_page_base(self) -> Optional[DuoStreamPage]:
         """
         Retrieve the list of available streaming sessions from the Duostream web interface.
         
         Returns:
-            dict: A dictionary containing information about the Duostream sessions
+            DuoStreamPage: The parsed base page, None if the web interface did not answer
         """
+        return await self._single_flight.run("base_page", self._fetch_html_page_base)
+
+    async def _fetch_html_page_base(self) -> Optional[DuoStreamPage]:
+        import httpx
+
         try:
-            client = httpx.AsyncClient(verify = False)
-            response = await client.get(
-                    f"http://{self._configuration.duo_ip_address}:{self._configuration.duo_port}",
-                    timeout=10
-                )
+            with self._stats.measure("base_page"):
+                response = await self._request("/", self._configuration.base_page_timeout)
             response.raise_for_status()
             if (response.status_code == 200 ):
-                return {"status": True, "value": response}
+                return self._parse_html_request(html_content=response.content)
+        except DuoStreamCircuitOpenError as e:
+            self._configuration.logger.debug(f"Base page not requested: {e}")
         except httpx.HTTPError  as e:
             self._configuration.logger.error(f"Request error: {e}")
-            return {"status": False, "value": str(e)}
-        return {"status": False, "value": ""}
+        return None
+
+    def _cached_session_names(self) -> Tuple[str, ...]:
+        """Return the session names known from the cache, without any I/O on the host."""
+        cached_data = self._read_session_cache() if self._sessions is None else self._sessions
+        return cached_data.names if cached_data is not None else ()
 
     async def get_sessions_available(self) -> List[str]:
         """
@@ -103,90 +435,422 @@ class DuoStreamDevice:
         Returns:
             List of session names
         """
+        return list(await self._single_flight.run("sessions_available", self._get_sessions_available))
+
+    async def _get_sessions_available(self) -> Tuple[str, ...]:
         # Check device and service status
         if not await self._check_device_online() or not await self._check_service_running():
             # Check cache first
-            cached_data = self._read_session_cache() if self._sessions is None else self._sessions
-            if cached_data and 'sessions' in cached_data:
-                return [session['name'] for session in cached_data['sessions']]
-            return []
+            return self._cached_session_names()
 
         # If no valid cache, fetch from web
-        html_page = await self._get_html_page_base()
-        if html_page["status"] is False:
-            return [session['name'] for session in self._sessions['sessions']]
-        
-        sessions_infos = self._parse_html_request(html_content=html_page["value"].text)
-        
-        # Write to cache
-        self._sessions = {
-                'timestamp': datetime.now().isoformat(),
-                'sessions': sessions_infos
-            }
-        
-        return [infos["name"] for infos in sessions_infos]
-        
-    def _parse_html_request(self,html_content) -> dict :
-            """        
-            Args:
-                html_content (str): The HTML content to parse
-                
-            Returns:
-                dict: A dictionary containing the parsed information
-            """
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Extract the hostname
-            hostname_div = soup.select_one('.label img[alt="Hostname"]')
-            hostname = hostname_div.parent.get_text().strip() if hostname_div else "Unknown Hostname"
-            
-            # Extract version
-            version_match = re.search(r'Duo v(\d+\.\d+\.\d+)', html_content)
-            version = version_match.group(1) if version_match else "Unknown"
-            
-            # Extract sessions information
-            sessions = []
-            rows = soup.select('tbody tr.row')
-            
-            for row in rows:
-                # Extract session name and URL
-                link = row.select_one('a.sunshine-link')
-                if link:
-                    session_name = link.get_text().strip()
-                    session_url = link.get('href')
-                    
-                                    
-                    sessions.append({
-                        "name": session_name,
-                        "url" : session_url
-                    })
-            return sessions
+        page = await self._get_html_page_base()
+        if page is None:
+            return self._cached_session_names()
+        return page.session_names
+
+    def _parse_html_request(self,html_content) -> DuoStreamPage :
+        """
+        Parse the base page and keep its sessions for the cache.
+
+        Args:
+            html_content (bytes): The HTML content to parse
+
+        Returns:
+            DuoStreamPage: The hostname, version and sessions of the page
+        """
+        with self._stats.measure("html_parse"):
+            page = self._page_parser.parse(html_content)
+        sessions_changed = self._sessions is None or self._sessions.sessions != page.sessions
+        self._page = page
+        self._sessions = DuoStreamSessionList.from_page(page, time.time())
+        if sessions_changed:
+            self._schedule_session_cache_write()
+        return page
+
+    def get_cached_snapshot(self) -> DuoStreamSnapshot:
+        """
+        Build a snapshot from the session cache only, without any I/O on the host.
+
+        Used at startup so entities can be created before the host answered.
+
+        Returns:
+            DuoStreamSnapshot: The cached sessions, marked as not live
+        """
+        return self._publish(DuoStreamSnapshot(
+            sessions=self._cached_session_names(),
+            hostname=self._page.hostname,
+            version=self._page.version,
+            circuit_state=self.circuit_state,
+            live=False
+        ))
+
+    def _publish(self, snapshot: DuoStreamSnapshot) -> DuoStreamSnapshot:
+        """Stamp a new snapshot, it keeps the revision of the previous one if the state of the host is the same."""
+        previous = self._snapshot
+        if previous is None:
+            revision = 1
+        else:
+            revision = previous.revision if snapshot == previous else previous.revision + 1
+        self._snapshot = replace(snapshot, fetched_at=time.time(), revision=revision)
+        return self._snapshot
+
+    async def get_snapshot(self) -> DuoStreamSnapshot:
+        """
+        Probe the host once and build the state shared by every entity.
+
+        A single ping, a single base page fetch and one instance query per session
+        are issued, whatever the number of entities reading the snapshot.
+
+        Returns:
+            DuoStreamSnapshot: The state of the host for this refresh cycle
+        """
+        return await self._single_flight.run("snapshot", self._build_snapshot)
+
+    async def _build_snapshot(self) -> DuoStreamSnapshot:
+        with self._stats.measure("refresh_cycle"):
+            snapshot = await self._probe_snapshot()
+        # The sessions cannot be read while the host or service is down, a blip must not
+        # count as a stop and a start. A session whose query failed keeps its previous status
+        if snapshot.service_running:
+            changed = self._history.sync(snapshot.instances, unknown=self._unanswered_sessions)
+        else:
+            changed = self._history.suspend()
+        if changed:
+            self._schedule_session_cache_write()
+        return self._publish(snapshot)
+
+    async def _probe_snapshot(self) -> DuoStreamSnapshot:
+        self._unanswered_sessions = set()
+        if not await self._check_device_online():
+            return DuoStreamSnapshot(
+                sessions=self._cached_session_names(),
+                circuit_state=self.circuit_state
+            )
+
+        # If cannot get the base page it means that the service is not available
+        page = await self._get_html_page_base()
+        if page is None:
+            return DuoStreamSnapshot(
+                host_online=True,
+                sessions=self._cached_session_names(),
+                circuit_state=self.circuit_state
+            )
+
+        sessions = page.session_names
+
+        # A session that did not answer keeps the status of the previous snapshot
+        previous = self._snapshot or DuoStreamSnapshot()
+        instances = {}
+        for session_name, status in (await self.get_all_session_statuses(sessions)).items():
+            if isinstance(status, Exception):
+                if not isinstance(status, DuoStreamCircuitOpenError):
+                    self._configuration.logger.error(f"Request error for session {session_name}: {status}")
+                self._unanswered_sessions.add(session_name)
+                status = previous.session_status(session_name)
+            instances[session_name] = status
+
+        return DuoStreamSnapshot(
+            host_online=True,
+            service_running=True,
+            sessions=sessions,
+            instances=MappingProxyType(instances),
+            hostname=page.hostname,
+            version=page.version,
+            circuit_state=self.circuit_state
+        )
+
+    def _sunshine_urls(self) -> Dict[str, str]:
+        """Return the Sunshine URL of every session, a loopback host is replaced by the address of the computer."""
+        sessions = self._page.sessions or (self._sessions.sessions if self._sessions is not None else ())
+        urls = {}
+        for session in sessions:
+            url = session.url
+            if not url:
+                continue
+            try:
+                parts = urlsplit(url)
+                if parts.hostname in (None, "localhost", "127.0.0.1", "::1"):
+                    # The Duo page links to Sunshine as seen from the computer itself
+                    netloc = self._configuration.duo_ip_address + (f":{parts.port}" if parts.port else "")
+                    parts = parts._replace(scheme=parts.scheme or "https", netloc=netloc)
+            except ValueError as e:
+                # A malformed link only leaves its own session without URL
+                self._configuration.logger.debug(f"Invalid Sunshine URL of {session.name}: {e}")
+                continue
+            urls[session.name] = urlunsplit(parts)
+        return urls
+
+    async def probe_sunshine_endpoints(self, session_names: List[str]) -> Mapping[str, DuoStreamEndpointHealth]:
+        """
+        Probe the Sunshine endpoint of the given sessions concurrently.
+
+        Any HTTP answer, an authentication request included, means the stream
+        backend is responsive. At most `max_concurrent_requests` probes are in
+        flight and the results of sessions no longer probed are dropped.
+
+        Args:
+            session_names (list): Sessions to probe, usually the running ones
+
+        Returns:
+            Mapping: The health of each probed session
+        """
+        import httpx
+
+        urls = self._sunshine_urls()
+        semaphore = asyncio.Semaphore(self._configuration.max_concurrent_requests)
+
+        async def probe(session_name: str) -> DuoStreamEndpointHealth:
+            url = urls.get(session_name)
+            if url is None:
+                return DuoStreamEndpointHealth(responsive=False, checked_at=time.time())
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await self._get_client().get(url, timeout=self._configuration.sunshine_probe_timeout)
+                except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+                    # Only this session is unresponsive, the other probes go on
+                    self._stats.record("sunshine_probe", time.perf_counter() - started, error=True)
+                    self._configuration.logger.debug(f"Sunshine endpoint of {session_name} did not answer: {e}")
+                    return DuoStreamEndpointHealth(responsive=False, checked_at=time.time())
+                elapsed = time.perf_counter() - started
+                self._stats.record("sunshine_probe", elapsed)
+                return DuoStreamEndpointHealth(
+                    responsive=True,
+                    latency_ms=round(elapsed * 1000, 1),
+                    status_code=response.status_code,
+                    checked_at=time.time()
+                )
+
+        results = await asyncio.gather(*(probe(session_name) for session_name in session_names))
+        self._sunshine_health = dict(zip(session_names, results))
+        return self.sunshine_health
 
     async def get_session_status(self,session_name:str) -> bool:
 
         if not await self._check_device_online() or not await self._check_service_running():
             self._configuration.logger.debug(f"Info: get_session_status : Request DuoStream computer or service is not activated")
             return False
+        return await self._query_session_status(session_name)
+
+    async def get_all_session_statuses(self, session_names: Optional[List[str]] = None) -> Dict[str, Union[bool, Exception]]:
+        """
+        Query the instance endpoint of every session concurrently.
+
+        At most `max_concurrent_requests` queries are in flight at once and the whole
+        batch is bounded by `status_batch_deadline`. The host and service are assumed to be up.
+
+        Args:
+            session_names (list): Sessions to query, the cached sessions when omitted
+
+        Returns:
+            dict: The status of each session, or the exception raised while querying it
+        """
+        if session_names is None:
+            session_names = self._cached_session_names()
+        if not session_names:
+            return {}
+
+        semaphore = asyncio.Semaphore(self._configuration.max_concurrent_requests)
+
+        async def fetch(session_name):
+            async with semaphore:
+                return await self._fetch_session_status(session_name)
+
+        return await self._run_bounded(session_names, fetch, self._configuration.status_batch_deadline)
+
+    async def _run_bounded(
+        self,
+        session_names: List[str],
+        operation: Callable[[str], Awaitable[T]],
+        deadline: float
+    ) -> Dict[str, Union[T, Exception]]:
+        """
+        Run an operation for every session concurrently and stop waiting at the deadline.
+
+        The operations still running at the deadline are cancelled.
+
+        Args:
+            session_names (list): Sessions to run the operation for
+            operation: Coroutine function called with each session name
+            deadline (float): Seconds allowed for the whole batch
+
+        Returns:
+            dict: The result of each session, or the exception raised, a TimeoutError past the deadline
+        """
+        tasks = {session_name: asyncio.ensure_future(operation(session_name)) for session_name in session_names}
         try:
-            client = httpx.AsyncClient(verify = False)
-            response = await client.get(f"http://{self._configuration.duo_ip_address}:{self._configuration.duo_port}/instances/{session_name}")
-            response.raise_for_status()
-            if response.status_code != 200:
-                return False            
-            return True if response.text == "true" else False
-        except httpx.HTTPError as e:
+            _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        results = {}
+        for session_name, task in tasks.items():
+            if task in pending:
+                results[session_name] = TimeoutError(f"No answer from session {session_name} before the deadline")
+            elif task.exception() is not None:
+                results[session_name] = task.exception()
+            else:
+                results[session_name] = task.result()
+        return results
+
+    @staticmethod
+    def _error_messages(results: Dict[str, Union[Optional[str], Exception]]) -> Dict[str, Optional[str]]:
+        """Turn the exceptions of a batch into error messages, keeping None for the sessions that succeeded."""
+        return {
+            session_name: (str(result) or type(result).__name__) if isinstance(result, Exception) else result
+            for session_name, result in results.items()
+        }
+
+    async def _query_session_status(self,session_name:str) -> bool:
+        """Query the instance endpoint of a session, the host and service are assumed to be up."""
+        import httpx
+
+        try:
+            return await self._fetch_session_status(session_name)
+        except (httpx.HTTPError, DuoStreamCircuitOpenError) as e:
             self._configuration.logger.error(f"Request error: {e}")
             return False
 
-    async def change_session_status(self,session_name:str,new_status:bool):
+    async def _fetch_session_status(self,session_name:str) -> bool:
+        """Query the instance endpoint of a session and raise on request errors."""
+        return await self._single_flight.run(
+            ("session_status", session_name),
+            lambda: self._request_session_status(session_name)
+        )
+
+    async def _request_session_status(self,session_name:str) -> bool:
+        with self._stats.measure("instance_query"):
+            response = await self._request(f"/instances/{session_name}", self._configuration.instance_status_timeout)
+            response.raise_for_status()
+            return response.text == "true"
+
+    async def change_session_status(self,session_name:str,new_status:bool) -> bool:
+        """
+        Start or stop a session.
+
+        Args:
+            session_name (str): Name of the Duo instance
+            new_status (bool): True to start, False to stop the session
+
+        Returns:
+            bool: True if the host accepted the command
+        """
         if not await self._check_device_online() or not await self._check_service_running():
             self._configuration.logger.warning(f"ERROR: Request DuoStream computer or service is not activated")
+            return False
+        import httpx
+
         try:
-            client = httpx.AsyncClient(verify = False)
-            response = await client.get(f"http://{self._configuration.duo_ip_address}:{self._configuration.duo_port}/instances/{session_name}/{"start" if new_status is True else "stop" }")
-            response.raise_for_status()
-        except httpx.HTTPError as e:
+            await self._send_session_command(session_name, new_status)
+            return True
+        except (httpx.HTTPError, DuoStreamCircuitOpenError) as e:
             self._configuration.logger.error(f"Request error: {e}")
+            return False
+
+    async def _send_session_command(self, session_name: str, new_status: bool):
+        """Send the start or stop request of a session and raise on request errors."""
+        action = "start" if new_status is True else "stop"
+        with self._stats.measure("instance_command"):
+            response = await self._request(f"/instances/{session_name}/{action}", self._configuration.instance_command_timeout)
+        response.raise_for_status()
+
+    async def change_sessions_status(
+        self,
+        new_status: bool,
+        session_names: Optional[List[str]] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Start or stop several sessions concurrently and wait until the host confirms them.
+
+        The host and service are checked once for the whole batch. At most
+        `max_concurrent_requests` commands are in flight at once, sessions already
+        in the requested status are left alone. The batch is bounded by
+        `instance_command_timeout` plus `confirm_timeout`.
+
+        Args:
+            new_status (bool): True to start, False to stop the sessions
+            session_names (list): Sessions to change, the cached sessions when omitted
+
+        Returns:
+            dict: None for each session that reached the status, the error message otherwise
+        """
+        if session_names is None:
+            session_names = self._cached_session_names()
+        if not session_names:
+            return {}
+        if not await self._check_device_online() or not await self._check_service_running():
+            return {session_name: "DuoStream computer or service is not activated" for session_name in session_names}
+
+        semaphore = asyncio.Semaphore(self._configuration.max_concurrent_requests)
+
+        async def apply(session_name):
+            async with semaphore:
+                if await self._fetch_session_status(session_name) == new_status:
+                    return None
+                started = time.monotonic()
+                await self._send_session_command(session_name, new_status)
+            if not await self.wait_for_session_status(session_name, new_status):
+                return f"Session {session_name} did not turn {'on' if new_status else 'off'}"
+            self.record_session_command(session_name, new_status, time.monotonic() - started)
+            return None
+
+        return self._error_messages(await self._run_bounded(
+            session_names,
+            apply,
+            self._configuration.instance_command_timeout + self._configuration.confirm_timeout
+        ))
+
+    async def wait_for_session_status(self, session_name: str, expected: bool, interval: Optional[float] = None) -> bool:
+        """
+        Poll the instance endpoint until the session reaches the expected status.
+
+        Args:
+            session_name (str): Name of the Duo instance
+            expected (bool): Status to wait for
+            interval (float): Seconds between two polls, `confirm_interval` by default
+
+        Returns:
+            bool: True if the status was reached before `confirm_timeout`
+        """
+        import httpx
+
+        async def status_reached():
+            try:
+                return await self._fetch_session_status(session_name) == expected
+            except (httpx.HTTPError, DuoStreamCircuitOpenError) as e:
+                self._configuration.logger.debug(f"Session {session_name} not confirmed yet: {e}")
+                return False
+
+        return await self._wait_until(status_reached, interval=interval)
+
+    async def wait_for_service_status(self, expected: bool) -> bool:
+        """
+        Poll the web interface until the Duo service reaches the expected status.
+
+        Args:
+            expected (bool): True to wait for the service to run, False for it to stop
+
+        Returns:
+            bool: True if the status was reached before `confirm_timeout`
+        """
+        async def status_reached():
+            return (await self._get_html_page_base() is not None) == expected
+
+        return await self._wait_until(status_reached)
+
+    async def _wait_until(self, condition, timeout: Optional[float] = None, interval: Optional[float] = None) -> bool:
+        """Poll the condition every `interval` seconds, `confirm_interval` by default, for `confirm_timeout` at most."""
+        try:
+            async with asyncio.timeout(self._configuration.confirm_timeout if timeout is None else timeout):
+                while not await condition():
+                    await asyncio.sleep(self._configuration.confirm_interval if interval is None else interval)
+                return True
+        except TimeoutError:
+            return False
 
 
     async def activate_duo_stream_service(self, activation: bool) -> bool:
@@ -206,87 +870,261 @@ class DuoStreamDevice:
             return False
 
         action = "start" if activation is True else "stop"
-        # Build the SSH command
-        ssh_command = f'ssh {self._configuration.duo_host_name}@{self._configuration.duo_ip_address} "net {action} duo"'
 
         try:
-            # Create subprocess with asyncio
-            process = await asyncio.create_subprocess_shell(
-                ssh_command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                shell=True,
+            returncode, output, error = await self._run_ssh(f"net {action} duo", COMMAND_TIMEOUT)
+        except DuoStreamCircuitOpenError as e:
+            self._configuration.logger.warning(f"Cannot {action} Duo service: {e}")
+            return False
+        except TimeoutError:
+            self._configuration.logger.error(
+                f"SSH command timed out while attempting to {action} Duo service"
             )
-            
-            try:
-                # Execute with timeout
-                async with asyncio.timeout(COMMAND_TIMEOUT):  # 30 seconds timeout
-                    stdout, stderr = await process.communicate()
-                    
-                    # Check return code
-                    if process.returncode == 0:
-                        output = stdout.decode('utf-8', errors='replace').strip()
-                        self._configuration.logger.debug(f"SSH command returned: {output}")
-                        return True
-                    else:
-                        error = stderr.decode('utf-8', errors='replace').strip()
-                        self._configuration.logger.error(
-                            f"Failed to {action} Duo service. Error: {error}"
-                        )
-                        return False
-                        
-            except TimeoutError:
-                self._configuration.logger.error(
-                    f"SSH command timed out while attempting to {action} Duo service"
-                )
-                return False
-                
+            return False
         except Exception as e:
             self._configuration.logger.error(
                 f"Unexpected error when {action}ing Duo service: {str(e)}"
             )
             return False
+
+        # Check return code
+        if returncode == 0:
+            self._configuration.logger.debug(f"SSH command returned: {output}")
+            return True
+        self._configuration.logger.error(
+            f"Failed to {action} Duo service. Error: {error}"
+        )
+        return False
+
+    def send_wake_on_lan(self):
+        """
+        Broadcast the Wake-on-LAN magic packet of the computer.
+
+        ValueError is raised when `mac_address` is not a valid MAC address, OSError when the packet cannot be sent.
+        """
+        packet = b"\xff" * 6 + parse_mac_address(self._configuration.mac_address) * 16
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.setblocking(False)
+            sock.sendto(packet, (self._configuration.wol_broadcast_address, self._configuration.wol_port))
+        self._configuration.logger.debug(f"Wake-on-LAN packet sent to {self._configuration.mac_address}")
+
+    async def _wake_probe(self) -> bool:
+        """Probe the computer without the probe cache and the circuit breaker, for the wake loop."""
+        async with self._probe_limiter:
+            if self._configuration.probe_method == "icmp":
+                online = await self._probe_icmp(self._configuration.wake_probe_timeout)
+            else:
+                online = await self._probe_tcp(self._configuration.wake_probe_timeout)
+        if online:
+            # The host is back, stop failing fast and share the result with the other callers
+            self._host_breaker.record_success()
+            self._power_status = True
+            self._power_status_time = time.monotonic()
+        return online
+
+    async def _wait_for_wake(self):
+        """Probe the computer every `wake_probe_interval` seconds until it answers, resending the magic packet."""
+        last_packet = time.monotonic()
+        while not await self._wake_probe():
+            if time.monotonic() - last_packet >= self._configuration.wol_resend_interval:
+                self.send_wake_on_lan()
+                last_packet = time.monotonic()
+            await asyncio.sleep(self._configuration.wake_probe_interval)
+
+    async def _ensure_service_started(self) -> bool:
+        """Start the Duo service if its port is closed and wait for the web interface to answer."""
+        activated = False
+
+        async def service_running():
+            nonlocal activated
+            # The port is checked before any HTTP request so that the service breaker is not tripped while booting
+            if await self._connect_duo_port(self._configuration.wake_probe_timeout):
+                return await self._get_html_page_base() is not None
+            if not activated:
+                # The service may be starting on its own, `net start` then fails and is retried on the next poll
+                activated = await self.activate_duo_stream_service(True)
+            return False
+
+        return await self._wait_until(
+            service_running,
+            self._configuration.cold_start_timeout,
+            self._configuration.wake_probe_interval
+        )
+
+    async def start_session_from_cold(
+        self,
+        session_name: str,
+        progress: Optional[Callable[[str, float], None]] = None
+    ) -> DuoStreamColdStartResult:
+        """
+        Wake the computer if needed, make sure the Duo service runs and start a session.
+
+        Stages are "wake", "boot", "service" and "session", the ones already
+        done on the host are skipped. The whole operation is bounded by `cold_start_timeout`.
+
+        Args:
+            session_name (str): Name of the Duo instance to start
+            progress: Called with the stage and the seconds elapsed each time a stage starts, then with "ready"
+
+        Returns:
+            DuoStreamColdStartResult: The stage timings, and the failed stage and error if the session is not running
+        """
+        result = DuoStreamColdStartResult(session_name)
+        started = time.monotonic()
+        stage_started = started
+
+        def enter(stage: str):
+            nonlocal stage_started
+            now = time.monotonic()
+            if result.stage:
+                result.timings[result.stage] = round(now - stage_started, 3)
+            result.stage = stage
+            stage_started = now
+            if progress is not None:
+                progress(stage, round(now - started, 3))
+
+        try:
+            async with asyncio.timeout(self._configuration.cold_start_timeout):
+                enter("wake")
+                if not await self._wake_probe():
+                    self.send_wake_on_lan()
+                    enter("boot")
+                    await self._wait_for_wake()
+
+                enter("service")
+                if not await self._ensure_service_started():
+                    result.error = "Duo service did not start"
+                    return result
+
+                enter("session")
+                if not await self._query_session_status(session_name):
+                    command_sent = time.monotonic()
+                    if not await self.change_session_status(session_name, True):
+                        result.error = f"Session {session_name} could not be started"
+                        return result
+                    if not await self.wait_for_session_status(session_name, True, self._configuration.wake_probe_interval):
+                        result.error = f"Session {session_name} did not start"
+                        return result
+                    self.record_session_command(session_name, True, time.monotonic() - command_sent)
+
+                enter("ready")
+                result.success = True
+        except TimeoutError:
+            result.error = f"Deadline of {self._configuration.cold_start_timeout}s reached"
+        except (ValueError, OSError) as e:
+            result.error = str(e)
         finally:
-            # Ensure process cleanup
-            if 'process' in locals() and process:
-                try:
-                    process.kill()
-                    if hasattr(process, '_transport'):
-                        process._transport.close()
-                except Exception:
-                    pass
+            if not result.success and result.stage:
+                result.timings[result.stage] = round(time.monotonic() - stage_started, 3)
+            self._stats.record("cold_start", time.monotonic() - started, error=not result.success)
+        return result
 
 
     async def get_power_status_computer(self) -> bool:
+        """
+        Check if computer is reachable.
+
+        The result of the last probe is reused for `probe_ttl` seconds so that
+        every caller within one window shares a single answer.
+
+        Returns:
+            bool: Computer online status
+        """
+        now = time.monotonic()
+        if self._power_status is not None and now - self._power_status_time < self._configuration.probe_ttl:
+            return self._power_status
+
+        online = await self._single_flight.run("power_status", self._probe_power_status)
+
+        self._power_status = online
+        self._power_status_time = time.monotonic()
+        return online
+
+    async def _probe_power_status(self) -> bool:
+        probe = self._probe_icmp if self._configuration.probe_method == "icmp" else self._probe_tcp
+        try:
+            # While the circuit is open the host is reported offline without probing it
+            async with self._probe_limiter:
+                started = time.perf_counter()
+                online = await self._host_breaker.call(probe, failed=lambda online: not online)
+            self._stats.record("ping_probe", time.perf_counter() - started, error=not online)
+            return online
+        except DuoStreamCircuitOpenError:
+            return False
+
+    async def _probe_tcp(self, timeout: Optional[float] = None) -> bool:
+        """
+        Check if computer is reachable by opening a TCP connection to the Duo port.
+
+        A refused connection still proves that the computer answered, only the
+        service is down, so it is reported as online.
+
+        Returns:
+            bool: Computer online status
+        """
+        return await self._connect_duo_port(timeout) is not None
+
+    async def _connect_duo_port(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """
+        Open and close a TCP connection to the Duo port.
+
+        Returns:
+            bool: True if the port accepted the connection, False if the computer refused it, None if it did not answer
+        """
+        try:
+            async with asyncio.timeout(self._configuration.probe_timeout if timeout is None else timeout):
+                _, writer = await asyncio.open_connection(
+                    self._configuration.duo_ip_address,
+                    int(self._configuration.duo_port)
+                )
+        except ConnectionRefusedError:
+            return False
+        except (OSError, TimeoutError, ValueError) as e:
+            self._configuration.logger.debug(f"TCP probe of {self._configuration.duo_ip_address} failed: {e}")
+            return None
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def _probe_icmp(self, timeout: Optional[float] = None) -> bool:
         """
         Check if computer is reachable via ping.
+
+        The reply is awaited for `probe_timeout` seconds, ping only takes whole seconds.
         
         Returns:
             bool: Computer online status
         """
+        timeout = self._configuration.probe_timeout if timeout is None else timeout
         # Extract the ping command to a variable for better readability
-        ping_command = f'ping {self._configuration.duo_ip_address} -c 1'
+        ping_command = f'ping {self._configuration.duo_ip_address} -c 1 -W {max(1, math.ceil(timeout))}'
         
         try:
-            # Create subprocess with timeout handling
-            process = await asyncio.create_subprocess_shell(
-                ping_command,
-                stdin=None,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                close_fds=False,  # required for posix_spawn
-            )
-            
-            # Handle process communication with timeout
-            try:
-                async with asyncio.timeout(COMMAND_TIMEOUT):
-                    _, _ = await process.communicate()
-                    # Return True if ping was successful (returncode 0)
-                    return process.returncode == 0
-            except TimeoutError:
-                self._configuration.logger.debug(
-                    "Timed out running command: `%s`, after: %ss", ping_command, COMMAND_TIMEOUT
+            async with self._subprocess_limiter:
+                # Create subprocess with timeout handling
+                process = await asyncio.create_subprocess_shell(
+                    ping_command,
+                    stdin=None,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    close_fds=False,  # required for posix_spawn
                 )
+
+                # Handle process communication with timeout
+                try:
+                    async with asyncio.timeout(timeout):
+                        _, _ = await process.communicate()
+                        # Return True if ping was successful (returncode 0)
+                        return process.returncode == 0
+                except TimeoutError:
+                    self._configuration.logger.debug(
+                        "Timed out running command: `%s`, after: %ss", ping_command, timeout
+                    )
         finally:
             # Ensure process cleanup in all cases
             if 'process' in locals() and process:
@@ -307,60 +1145,106 @@ class DuoStreamDevice:
         Returns:
             bool: Service running status (True if running, False otherwise)
         """
+        return await self._single_flight.run(
+            ("service_status", use_ssh),
+            lambda: self._get_duostream_service_status(use_ssh)
+        )
+
+    async def _get_duostream_service_status(self,use_ssh:bool=False) -> bool:
         # Mandatory device online check
         if not await self._check_device_online():
             self._configuration.logger.debug("Cannot check service status: Device offline")
             return False
 
-        # Build the SSH command to check if Duo service is running
         if (use_ssh == True):
-            ssh_command = f'ssh {self._configuration.duo_host_name}@{self._configuration.duo_ip_address} "net start | findstr /i Duo"'
             try:
-                # Create subprocess asynchronously
-                process = await asyncio.create_subprocess_shell(
-                    ssh_command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    shell=True,
-                )
-                
-                try:
-                    # Execute with timeout
-                    async with asyncio.timeout(20):  # 20 seconds timeout
-                        stdout, _ = await process.communicate()
-                        
-                        # Check if service is running by looking for "Duo" in the output
-                        if process.returncode == 0:
-                            output = stdout.decode('utf-8', errors='replace').strip()
-                            service_running = "Duo" in output
-                            self._configuration.logger.debug(
-                                f"Duo service is {'running' if service_running else 'not running'}"
-                            )
-                            return service_running
-                        else:
-                            # Command failed - service is likely not running
-                            return False
-                            
-                except TimeoutError:
-                    self._configuration.logger.error("SSH command timed out while checking Duo service status")
-                    return False
-                    
+                returncode, output, _ = await self._run_ssh("net start | findstr /i Duo", 20)
+            except DuoStreamCircuitOpenError as e:
+                self._configuration.logger.debug(f"Cannot check service status: {e}")
+                return False
+            except TimeoutError:
+                self._configuration.logger.error("SSH command timed out while checking Duo service status")
+                return False
             except Exception as e:
                 self._configuration.logger.error(f"Error checking Duo service status: {str(e)}")
                 return False
-            finally:
-                # Ensure process cleanup
-                if 'process' in locals() and process:
-                    try:
-                        process.kill()
-                        if hasattr(process, '_transport'):
-                            process._transport.close()
-                    except Exception:
-                        pass
+
+            # Command failed - service is likely not running
+            if returncode != 0:
+                return False
+            # Check if service is running by looking for "Duo" in the output
+            service_running = "Duo" in output
+            self._configuration.logger.debug(
+                f"Duo service is {'running' if service_running else 'not running'}"
+            )
+            return service_running
         else :
             # If cannot get the base page it means that the service is not available 
-            return (await self._get_html_page_base())["status"]
+            return await self._get_html_page_base() is not None
+
+
+    async def append_new_device_pin(
+        self,
+        session_names: Union[str, List[str], None],
+        pin_code: str,
+        computer_name: str,
+        sunshine_user: str,
+        sunshine_password: str
+    ) -> Dict[str, Optional[str]]:
+        """
+        Send the PIN shown by a Moonlight client to the Sunshine API of one, several or all sessions.
 
+        The requests are sent concurrently over the pooled HTTP client, at most
+        `max_concurrent_requests` at once, with the same credentials for every
+        session. The whole operation is bounded by `sunshine_pair_timeout`.
+
+        Args:
+            session_names (str or list): Session or sessions to pair, all the known sessions when None
+            pin_code (str): The 4 digit PIN displayed by the client
+            computer_name (str): Name the client is paired under
+            sunshine_user (str): User of the Sunshine web interface
+            sunshine_password (str): Password of the Sunshine web interface
+
+        Returns:
+            dict: None for each session that accepted the PIN, the error message otherwise
+        """
+        import httpx
+
+        if session_names is None:
+            session_names = self._cached_session_names()
+        elif isinstance(session_names, str):
+            session_names = [session_names]
+        if not session_names:
+            return {}
+        if not re.fullmatch(r"\d{4}", pin_code or ""):
+            return {session_name: f"Invalid PIN {pin_code!r}, 4 digits expected" for session_name in session_names}
+
+        urls = self._sunshine_urls()
+        # One credential object for every request, the pooled client keeps a connection per Sunshine instance
+        auth = httpx.BasicAuth(sunshine_user, sunshine_password)
+        semaphore = asyncio.Semaphore(self._configuration.max_concurrent_requests)
+
+        async def pair(session_name: str) -> Optional[str]:
+            url = urls.get(session_name)
+            if url is None:
+                return f"No Sunshine URL known for session {session_name}"
+            async with semaphore:
+                with self._stats.measure("sunshine_pair"):
+                    response = await self._get_client().post(
+                        f"{url.rstrip('/')}/api/pin",
+                        json={"pin": pin_code, "name": computer_name},
+                        auth=auth,
+                        timeout=self._configuration.sunshine_pair_timeout
+                    )
+            if response.status_code == 401:
+                return f"Sunshine of session {session_name} rejected the credentials"
+            response.raise_for_status()
+            # Older Sunshine versions answer the status as a string
+            if str(response.json().get("status")).lower() != "true":
+                return f"Sunshine of session {session_name} has no pairing request waiting for this PIN"
+            self._configuration.logger.info(f"Paired {computer_name} with session {session_name}")
+            return None
 
-    def append_new_device_pin(self,session_name,pin_code,computer_name,sunshine_user,sunshine_password):
-        ...
+        return self._error_messages(
+            await self._run_bounded(session_names, pair, self._configuration.sunshine_pair_timeout)
+        )
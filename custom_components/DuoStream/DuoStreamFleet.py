@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+from .DuoStreamCache import DuoStreamCacheStore
+from .DuoStreamStats import DuoStreamStats
+
+if TYPE_CHECKING:
+    import httpx
+
+class DuoStreamFleet:
+    """
+    Resources shared by every DuoStream host monitored by one Home Assistant instance.
+
+    - One pooled HTTP client serves the requests of all the hosts.
+    - Global semaphores bound the reachability probes and the ping/ssh
+      subprocesses running at once, whatever the number of hosts.
+    - Hosts get staggered first polls so their refresh cycles do not line up.
+      Each host holds a stagger slot while registered, a reloaded host gets the
+      first free slot back.
+    - Session cache records are written by a single debounced writer, the
+      changes of all the hosts sharing a cache file land in one rewrite,
+      timed in the stats of each host it wrote a record for.
+
+    The HTTP limits of the fleet replace the `http_*` settings of the hosts.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_probes: int = 8,
+        max_concurrent_subprocesses: int = 2,
+        http_max_connections: int = 32,
+        http_max_keepalive_connections: int = 16,
+        http_keepalive_expiry: float = 30.0,
+        stagger_interval: float = 2.0,
+        stagger_period: float = 30.0,
+        cache_write_delay: float = 10.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            max_concurrent_probes (int): Reachability probes in flight across all hosts
+            max_concurrent_subprocesses (int): ping and ssh processes running across all hosts
+            stagger_interval (float): Seconds between the first polls of two hosts
+            stagger_period (float): The offsets of the first polls wrap around after this many seconds
+            cache_write_delay (float): Quiet period before pending cache records are written, unless the host gives its own
+        """
+        self._http_limits = (http_max_connections, http_max_keepalive_connections, http_keepalive_expiry)
+        self._stagger_interval = stagger_interval
+        self._stagger_period = stagger_period
+        self._cache_write_delay = cache_write_delay
+        self._logger = logger or logging.getLogger(__name__)
+        self.probe_limiter = asyncio.Semaphore(max_concurrent_probes)
+        self.subprocess_limiter = asyncio.Semaphore(max_concurrent_subprocesses)
+        self._client: Optional["httpx.AsyncClient"] = None
+        # Stagger slot of every registered host
+        self._slots: Dict[str, int] = {}
+        self._pending_writes: Dict[
+            Tuple[DuoStreamCacheStore, str],
+            Tuple[Callable[[], Optional[dict]], Optional[DuoStreamStats]]
+        ] = {}
+        self._cache_write_handle: Optional[asyncio.TimerHandle] = None
+        self._closed = False
+
+    @property
+    def hosts(self) -> Set[str]:
+        return set(self._slots)
+
+    def register(self, host_id: str) -> float:
+        """
+        Add a host to the fleet.
+
+        Args:
+            host_id (str): Unique identifier of the host, the config entry id
+
+        Returns:
+            float: Seconds to wait before the first poll of the host
+        """
+        slot = self._slots.get(host_id)
+        if slot is None:
+            taken = set(self._slots.values())
+            slot = self._slots[host_id] = next(index for index in range(len(taken) + 1) if index not in taken)
+        return (slot * self._stagger_interval) % self._stagger_period
+
+    def unregister(self, host_id: str) -> bool:
+        """
+        Remove a host from the fleet.
+
+        Returns:
+            bool: True if no host is left and the fleet can be closed
+        """
+        self._slots.pop(host_id, None)
+        return not self._slots
+
+    def get_client(self) -> "httpx.AsyncClient":
+        """Return the HTTP client shared by every host, creating it on first use."""
+        # Imported on first request so that loading the integration stays cheap
+        import httpx
+
+        if self._client is None or self._client.is_closed:
+            max_connections, max_keepalive_connections, keepalive_expiry = self._http_limits
+            self._client = httpx.AsyncClient(
+                verify=False,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+            )
+        return self._client
+
+    def schedule_cache_write(
+        self,
+        store: DuoStreamCacheStore,
+        conf_name: str,
+        record: Callable[[], Optional[dict]],
+        delay: Optional[float] = None,
+        stats: Optional[DuoStreamStats] = None
+    ):
+        """
+        Write the record of a configuration once no record changed for the quiet period.
+
+        Args:
+            store (DuoStreamCacheStore): Store of the cache file holding the record
+            conf_name (str): Configuration name the record is stored under
+            record: Returns the record to write, called when the write happens
+            delay (float): Quiet period of the host, `cache_write_delay` of the fleet when omitted
+            stats (DuoStreamStats): Stats of the host, the file rewrite is recorded as its cache_write
+        """
+        if self._closed:
+            # A refresh finishing during unload, its host wrote its record before the fleet closed
+            self._logger.debug(f"Cache write of {conf_name} dropped, the fleet is closed")
+            return
+        self._pending_writes[(store, conf_name)] = (record, stats)
+        if self._cache_write_handle is not None:
+            self._cache_write_handle.cancel()
+        self._cache_write_handle = asyncio.get_running_loop().call_later(
+            self._cache_write_delay if delay is None else delay,
+            self._write_cache_in_executor
+        )
+
+    def cancel_cache_write(self, store: DuoStreamCacheStore, conf_name: str):
+        """Drop the pending write of a configuration, used when its record is written directly."""
+        self._pending_writes.pop((store, conf_name), None)
+
+    def _write_cache_in_executor(self):
+        self._cache_write_handle = None
+        asyncio.get_running_loop().run_in_executor(None, self._write_records, self._take_pending_records())
+
+    def _take_pending_records(self) -> Dict[DuoStreamCacheStore, Tuple[Dict[str, dict], List[DuoStreamStats]]]:
+        """Collect the pending records and the stats of their hosts by cache file, on the event loop."""
+        pending, self._pending_writes = self._pending_writes, {}
+        by_store: Dict[DuoStreamCacheStore, Tuple[Dict[str, dict], List[DuoStreamStats]]] = {}
+        for (store, conf_name), (record, stats) in pending.items():
+            value = record()
+            if value is not None:
+                records, host_stats = by_store.setdefault(store, ({}, []))
+                records[conf_name] = value
+                if stats is not None:
+                    host_stats.append(stats)
+        return by_store
+
+    def _write_records(self, by_store: Dict[DuoStreamCacheStore, Tuple[Dict[str, dict], List[DuoStreamStats]]]):
+        """One file rewrite per cache file. Does blocking file I/O."""
+        for store, (records, host_stats) in by_store.items():
+            self._logger.debug(f"Writing {len(records)} session cache records")
+            with ExitStack() as stack:
+                for stats in host_stats:
+                    stack.enter_context(stats.measure("cache_write"))
+                store.write_many(records)
+
+    async def close(self):
+        """Write the pending cache records and close the shared HTTP client."""
+        self._closed = True
+        if self._cache_write_handle is not None:
+            self._cache_write_handle.cancel()
+            self._cache_write_handle = None
+        if self._pending_writes:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_records, self._take_pending_records())
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,211 @@
+import math
+import time
+from array import array
+from typing import Collection, Dict, List, Mapping, Optional, Set
+
+# Kinds of the events kept in the ring buffer
+EVENT_STOPPED = 0
+EVENT_STARTED = 1
+EVENT_STOP_COMMAND = 2
+EVENT_START_COMMAND = 3
+
+HISTORY_FORMAT_VERSION = 1
+
+class DuoStreamSessionHistory:
+    """
+    Session transitions and command latencies of one host in a fixed-size ring buffer.
+
+    Events are stored column-wise in preallocated arrays, the memory used does
+    not depend on how long Home Assistant runs. The derived figures (active
+    sessions, cumulative runtime, start and stop counts) are updated on every
+    event, the start latency percentiles are recomputed from the buffer only
+    after a new start command.
+
+    Runtime is only counted while the sessions can be seen running. While the
+    host is unreachable, and across a restart of Home Assistant, the running
+    sessions are suspended: their interval is closed, and the next refresh
+    resumes them or records their stop without counting a new start.
+    """
+
+    def __init__(self, capacity: int = 512):
+        self._capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._kinds = array('b', bytes(capacity))
+        self._sessions = array('H', bytes(2 * capacity))
+        self._latencies = array('f', [math.nan]) * capacity
+        self._next = 0
+        self._size = 0
+        # Session names are interned, the buffer only holds their index
+        self._session_names: List[str] = []
+        self._session_index: Dict[str, int] = {}
+        self._active_since: Dict[str, float] = {}
+        self._runtime: Dict[str, float] = {}
+        # Sessions running when their status was last readable
+        self._suspended: Set[str] = set()
+        self.starts = 0
+        self.stops = 0
+        self._start_latencies: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _intern(self, session_name: str) -> int:
+        index = self._session_index.get(session_name)
+        if index is None:
+            index = self._session_index[session_name] = len(self._session_names)
+            self._session_names.append(session_name)
+        return index
+
+    def _append(self, kind: int, session_name: str, at: float, latency: float = math.nan):
+        position = self._next
+        if self._size == self._capacity and self._kinds[position] == EVENT_START_COMMAND:
+            # The evicted latency must leave the percentiles
+            self._start_latencies = None
+        self._times[position] = at
+        self._kinds[position] = kind
+        self._sessions[position] = self._intern(session_name)
+        self._latencies[position] = latency
+        self._next = (position + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+    def sync(self, running: Mapping[str, bool], at: Optional[float] = None, unknown: Collection[str] = ()) -> bool:
+        """
+        Record the sessions that started or stopped since the last refresh.
+
+        Args:
+            running (Mapping): Status of every session read from the host
+            at (float): Epoch time of the refresh, now by default
+            unknown (Collection): Sessions whose status could not be read, left as they were
+
+        Returns:
+            bool: True if the history changed
+        """
+        at = time.time() if at is None else at
+        changed = False
+        for session_name in [
+            name for name in self._active_since if not running.get(name, False) and name not in unknown
+        ]:
+            since = self._active_since.pop(session_name)
+            self._runtime[session_name] = self._runtime.get(session_name, 0.0) + max(at - since, 0.0)
+            self._append(EVENT_STOPPED, session_name, at)
+            self.stops += 1
+            changed = True
+        for session_name in [
+            name for name in self._suspended if not running.get(name, False) and name not in unknown
+        ]:
+            # Stopped while its status could not be read, its runtime was closed when suspended
+            self._suspended.discard(session_name)
+            self._append(EVENT_STOPPED, session_name, at)
+            self.stops += 1
+            changed = True
+        for session_name, status in running.items():
+            if status and session_name not in self._active_since and session_name not in unknown:
+                self._active_since[session_name] = at
+                changed = True
+                if session_name in self._suspended:
+                    self._suspended.discard(session_name)
+                    continue
+                self._append(EVENT_STARTED, session_name, at)
+                self.starts += 1
+        return changed
+
+    def suspend(self, at: Optional[float] = None) -> bool:
+        """
+        Stop counting the runtime of the running sessions while their status cannot be read.
+
+        Args:
+            at (float): Epoch time the sessions were last known running, now by default
+
+        Returns:
+            bool: True if a session was running
+        """
+        at = time.time() if at is None else at
+        for session_name, since in self._active_since.items():
+            self._runtime[session_name] = self._runtime.get(session_name, 0.0) + max(at - since, 0.0)
+            self._suspended.add(session_name)
+        changed = bool(self._active_since)
+        self._active_since = {}
+        return changed
+
+    def record_command(self, session_name: str, new_status: bool, seconds: float, at: Optional[float] = None):
+        """Record the time a start or stop command took to be confirmed by the host."""
+        self._append(
+            EVENT_START_COMMAND if new_status else EVENT_STOP_COMMAND,
+            session_name,
+            time.time() if at is None else at,
+            seconds
+        )
+        if new_status:
+            self._start_latencies = None
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active_since)
+
+    def runtime(self, at: Optional[float] = None) -> float:
+        """Cumulative seconds the sessions ran, the running ones included up to now."""
+        at = time.time() if at is None else at
+        return sum(self._runtime.values()) + sum(max(at - since, 0.0) for since in self._active_since.values())
+
+    def _sorted_start_latencies(self) -> List[float]:
+        # Sorted once per new start command, reads in between are a lookup
+        if self._start_latencies is None:
+            self._start_latencies = sorted(
+                self._latencies[i] for i in range(self._size) if self._kinds[i] == EVENT_START_COMMAND
+            )
+        return self._start_latencies
+
+    def start_latency(self, fraction: float) -> Optional[float]:
+        """Return the given percentile of the start command latencies kept in the buffer, in seconds."""
+        latencies = self._sorted_start_latencies()
+        if not latencies:
+            return None
+        return round(latencies[min(int(fraction * len(latencies)), len(latencies) - 1)], 3)
+
+    @property
+    def start_latency_samples(self) -> int:
+        return len(self._sorted_start_latencies())
+
+    def as_record(self) -> dict:
+        """Compact form stored in the session cache, events in chronological order."""
+        order = [(self._next - self._size + i) % self._capacity for i in range(self._size)]
+        saved_at = time.time()
+        return {
+            "version": HISTORY_FORMAT_VERSION,
+            "session_names": list(self._session_names),
+            "times": [self._times[i] for i in order],
+            "kinds": [self._kinds[i] for i in order],
+            "sessions": [self._sessions[i] for i in order],
+            "latencies": [None if math.isnan(self._latencies[i]) else round(self._latencies[i], 3) for i in order],
+            # Suspended sessions are saved as starting now, they add no runtime when loaded
+            "active_since": {**dict.fromkeys(self._suspended, saved_at), **self._active_since},
+            "saved_at": saved_at,
+            "runtime": dict(self._runtime),
+            "starts": self.starts,
+            "stops": self.stops,
+        }
+
+    @classmethod
+    def from_record(cls, record: Optional[dict], capacity: int = 512) -> "DuoStreamSessionHistory":
+        """Rebuild a history from its cached form, an unknown or damaged record gives an empty history."""
+        history = cls(capacity)
+        if not record or record.get("version") != HISTORY_FORMAT_VERSION:
+            return history
+        try:
+            names = record["session_names"]
+            events = list(zip(record["times"], record["kinds"], record["sessions"], record["latencies"]))
+            # The most recent events are kept when the capacity shrank
+            for at, kind, session, latency in events[-capacity:]:
+                history._append(kind, names[session], at, math.nan if latency is None else latency)
+            history._active_since = {name: float(since) for name, since in record["active_since"].items()}
+            history._runtime = {name: float(seconds) for name, seconds in record["runtime"].items()}
+            history.starts = int(record["starts"])
+            history.stops = int(record["stops"])
+            # Home Assistant was not running since the record was saved, older records end with their last event
+            saved_at = record.get("saved_at")
+            if saved_at is None:
+                saved_at = max([*record["times"], *history._active_since.values()], default=0.0)
+            history.suspend(float(saved_at))
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            return cls(capacity)
+        return history
@@ -0,0 +1,167 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Optional, Tuple, Union
+
+VERSION_PATTERN = re.compile(r'Duo v(\d+\.\d+\.\d+)')
+
+# Elements without end tag, they are never pushed on the open elements stack
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+))
+
+@dataclass(frozen=True, slots=True)
+class DuoStreamSession:
+    """A Duo instance listed on the base page and the link to its Sunshine web interface."""
+    name: str
+    url: Optional[str] = None
+
+@dataclass(frozen=True, slots=True)
+class DuoStreamPage:
+    """Information extracted from the Duo web interface base page."""
+    hostname: str = "Unknown Hostname"
+    version: str = "Unknown"
+    sessions: Tuple[DuoStreamSession, ...] = ()
+    # Derived from the sessions once, callers read the names on every refresh
+    session_names: Tuple[str, ...] = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "session_names", tuple(session.name for session in self.sessions))
+
+class _SessionPageParser(HTMLParser):
+    """
+    Single pass event parser for the Duo base page.
+
+    Only the elements needed are tracked: the first `a.sunshine-link` of every
+    `tbody tr.row` and the text of the element holding `.label img[alt="Hostname"]`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hostname: Optional[str] = None
+        self.sessions = []
+        # Open elements as (tag, classes)
+        self._stack = []
+        self._tbody_depth = 0
+        self._row_depth: Optional[int] = None
+        self._row_has_link = False
+        self._link_href: Optional[str] = None
+        self._link_text: Optional[list] = None
+        self._hostname_depth: Optional[int] = None
+        self._hostname_text: Optional[list] = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").split()
+
+        if tag == "img":
+            if (
+                self.hostname is None
+                and self._hostname_depth is None
+                and attributes.get("alt") == "Hostname"
+                and self._stack
+                and any("label" in ancestor_classes for _, ancestor_classes in self._stack)
+            ):
+                self._hostname_depth = len(self._stack)
+                self._hostname_text = []
+            return
+        if tag in VOID_ELEMENTS:
+            return
+
+        if tag == "tbody":
+            self._tbody_depth += 1
+        elif tag == "tr" and self._tbody_depth and "row" in classes:
+            self._row_depth = len(self._stack) + 1
+            self._row_has_link = False
+        elif tag == "a" and self._row_depth is not None and not self._row_has_link and "sunshine-link" in classes:
+            self._row_has_link = True
+            self._link_href = attributes.get("href")
+            self._link_text = []
+
+        self._stack.append((tag, classes))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        # Close every element left open inside the one being closed
+        while self._stack:
+            open_tag, _ = self._stack.pop()
+            self._close(open_tag)
+            if open_tag == tag:
+                break
+
+    def _close(self, tag):
+        depth = len(self._stack) + 1
+        if tag == "a" and self._link_text is not None:
+            self.sessions.append(DuoStreamSession(
+                name="".join(self._link_text).strip(),
+                url=self._link_href
+            ))
+            self._link_text = None
+            self._link_href = None
+        elif tag == "tr" and self._row_depth == depth:
+            self._row_depth = None
+        elif tag == "tbody":
+            self._tbody_depth -= 1
+
+        if self._hostname_depth == depth:
+            self.hostname = "".join(self._hostname_text).strip()
+            self._hostname_depth = None
+            self._hostname_text = None
+
+    def handle_data(self, data):
+        if self._link_text is not None:
+            self._link_text.append(data)
+        if self._hostname_text is not None:
+            self._hostname_text.append(data)
+
+class DuoStreamPageParser:
+    """
+    Parse the Duo base page, skipping the work when the page did not change.
+
+    The raw body is hashed and compared to the previous one, an unchanged page
+    returns the previously parsed DuoStreamPage without parsing it again.
+    """
+
+    def __init__(self):
+        self._last_digest: Optional[bytes] = None
+        self._last_page: Optional[DuoStreamPage] = None
+
+    def parse(self, html_content: Union[str, bytes]) -> DuoStreamPage:
+        """
+        Args:
+            html_content (str | bytes): The HTML content to parse
+
+        Returns:
+            DuoStreamPage: The hostname, version and sessions of the page
+        """
+        raw = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+        if digest == self._last_digest:
+            return self._last_page
+
+        text = html_content if isinstance(html_content, str) else raw.decode('utf-8', errors='replace')
+        page = parse_page(text)
+        self._last_digest = digest
+        self._last_page = page
+        return page
+
+def parse_page(html_content: str) -> DuoStreamPage:
+    """Parse the Duo base page without any caching."""
+    parser = _SessionPageParser()
+    parser.feed(html_content)
+    parser.close()
+
+    version_match = VERSION_PATTERN.search(html_content)
+    return DuoStreamPage(
+        hostname=parser.hostname if parser.hostname is not None else "Unknown Hostname",
+        version=version_match.group(1) if version_match else "Unknown",
+        sessions=tuple(parser.sessions)
+    )
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+class DuoStreamSingleFlight:
+    """
+    Share one in-flight operation between concurrent callers of the same query.
+
+    The first caller of a key starts the operation, every caller arriving before
+    it completes awaits the same task and gets its result or exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Args:
+            key: Identifies the logical query, callers with equal keys share one call
+            operation: Coroutine function started when no call is in flight for the key
+
+        Returns:
+            The result of the shared call
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(operation())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # A cancelled caller must not cancel the call shared with the others
+        return await asyncio.shield(future)
+
+    def cancel_all(self):
+        """Cancel the calls in flight, their callers get a CancelledError."""
+        for future in list(self._calls.values()):
+            future.cancel()
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved when every caller went away
+            future.exception()
+
+class DuoStreamCircuitOpenError(Exception):
+    """Raised instead of calling a host known to be down."""
+
+class DuoStreamCircuitBreaker:
+    """
+    Fail fast while a host is known to be unreachable.
+
+    After `failure_threshold` consecutive failures the circuit opens and every
+    call is refused with DuoStreamCircuitOpenError. Once `reset_timeout` seconds
+    have passed the circuit is half-open: a single trial call goes through, its
+    success closes the circuit and its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go through, a half-open circuit lets a single trial call in."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN or self._trial_in_flight:
+            return False
+        self._state = self.HALF_OPEN
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    async def call(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        failure_exceptions: Tuple[Type[BaseException], ...] = (),
+        failed: Callable[[T], bool] = lambda result: False,
+    ) -> T:
+        """
+        Run an operation through the breaker.
+
+        Args:
+            operation: Coroutine function talking to the host
+            failure_exceptions: Exceptions meaning the host did not answer
+            failed: Tells whether a returned result means the host did not answer
+
+        Returns:
+            The result of the operation
+        """
+        if not self.allow():
+            raise DuoStreamCircuitOpenError("Host is unreachable, call skipped")
+        try:
+            result = await operation()
+        except failure_exceptions:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not a sign that the host is down, only give the trial back
+            self._trial_in_flight = False
+            raise
+        if failed(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
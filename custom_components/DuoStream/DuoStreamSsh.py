@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import List, Optional, Tuple
+
+class DuoStreamSshChannel:
+    """
+    Run commands on the DuoStream host over one persistent SSH connection.
+
+    A background OpenSSH master connection (ControlMaster) is opened on first use
+    and every command is multiplexed over it, so only the first command pays the
+    key exchange and authentication. The master is reopened lazily when it is gone
+    and commands are queued so concurrent callers never interleave.
+
+    A socket left over by a master that died, or by a previous run of Home
+    Assistant, would make every command fall back to a full connection. The
+    master behind an existing socket is checked before its first use and after
+    a command could not reach it, a stale socket is removed and the master reopened.
+    """
+
+    def __init__(self, configuration, spawn_limiter: Optional[AbstractAsyncContextManager] = None):
+        """
+        Args:
+            configuration (DuoStreamConfiguration): Host settings
+            spawn_limiter: Held while an ssh process runs, bounds the processes of several hosts
+        """
+        self._configuration = configuration
+        self._lock = asyncio.Lock()
+        self._spawn_limiter = spawn_limiter if spawn_limiter is not None else nullcontext()
+        target = f"{configuration.duo_host_name}@{configuration.duo_ip_address}:{configuration.duo_conf_name}"
+        # Keep the socket path short, unix sockets are limited to ~100 characters
+        self._control_path = os.path.join(
+            tempfile.gettempdir(),
+            f"duostream-{hashlib.sha1(target.encode()).hexdigest()[:16]}"
+        )
+        # True once the master behind the socket answered
+        self._master_checked = False
+
+    @property
+    def _target(self) -> str:
+        return f"{self._configuration.duo_host_name}@{self._configuration.duo_ip_address}"
+
+    def _ssh_args(self, *options: str) -> List[str]:
+        args = ["ssh"]
+        if self._configuration.ssh_persistent:
+            args += ["-o", f"ControlPath={self._control_path}"]
+        args += list(options)
+        args.append(self._target)
+        return args
+
+    async def _connect(self):
+        """Open the background master connection, commands fall back to a direct connection on failure."""
+        async with self._spawn_limiter:
+            process = await asyncio.create_subprocess_exec(
+                *self._ssh_args(
+                    "-o", "ControlMaster=yes",
+                    "-o", f"ControlPersist={self._configuration.ssh_persist_seconds}",
+                    "-f", "-N"
+                ),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                async with asyncio.timeout(self._configuration.ssh_connect_timeout):
+                    await process.wait()
+            except TimeoutError:
+                self._configuration.logger.debug(f"Timed out opening SSH master connection to {self._target}")
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+        self._master_checked = process.returncode == 0
+        if process.returncode != 0:
+            self._configuration.logger.debug(f"Cannot open SSH master connection to {self._target}")
+
+    async def _master_alive(self) -> bool:
+        """Ask the master behind the socket whether it is still running."""
+        async with self._spawn_limiter:
+            process = await asyncio.create_subprocess_exec(
+                *self._ssh_args("-O", "check"),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                async with asyncio.timeout(self._configuration.ssh_connect_timeout):
+                    await process.wait()
+            except TimeoutError:
+                process.kill()
+                await process.wait()
+        return process.returncode == 0
+
+    async def _ensure_master(self):
+        """Open the master connection unless a running one is behind the socket."""
+        if os.path.exists(self._control_path):
+            if self._master_checked or await self._master_alive():
+                self._master_checked = True
+                return
+            self._configuration.logger.info(f"Removing stale SSH control socket of {self._target}")
+            try:
+                os.unlink(self._control_path)
+            except FileNotFoundError:
+                pass
+        await self._connect()
+
+    async def run(self, command: str, timeout: float) -> Tuple[int, str, str]:
+        """
+        Run a command on the host.
+
+        Args:
+            command (str): Command line executed by the remote shell
+            timeout (float): Seconds allowed for the command, TimeoutError is raised past it
+
+        Returns:
+            tuple: Return code, stdout and stderr of the command
+        """
+        async with self._lock:
+            if self._configuration.ssh_persistent:
+                await self._ensure_master()
+
+            async with self._spawn_limiter:
+                process = await asyncio.create_subprocess_exec(
+                    *self._ssh_args("-o", "ControlMaster=no"),
+                    command,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    async with asyncio.timeout(timeout):
+                        stdout, stderr = await process.communicate()
+                finally:
+                    if process.returncode is None:
+                        process.kill()
+                        await process.wait()
+            if b"Control socket connect" in stderr:
+                # ssh fell back to a direct connection, the master is gone
+                self._master_checked = False
+
+        return (
+            process.returncode,
+            stdout.decode('utf-8', errors='replace').strip(),
+            stderr.decode('utf-8', errors='replace').strip(),
+        )
+
+    async def close(self):
+        """Stop the background master connection if one is running."""
+        if not self._configuration.ssh_persistent or not os.path.exists(self._control_path):
+            return
+        async with self._lock, self._spawn_limiter:
+            process = await asyncio.create_subprocess_exec(
+                *self._ssh_args("-O", "exit"),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                async with asyncio.timeout(self._configuration.ssh_connect_timeout):
+                    await process.wait()
+            except TimeoutError:
+                process.kill()
+                await process.wait()
+            self._master_checked = False
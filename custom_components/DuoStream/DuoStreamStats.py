@@ -0,0 +1,124 @@
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Upper bounds of the latency buckets in milliseconds, slower calls fall in a last overflow bucket
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# I/O primitives measured by DuoStreamDevice
+PRIMITIVES = (
+    "refresh_cycle",
+    "ping_probe",
+    "base_page",
+    "instance_query",
+    "instance_command",
+    "ssh_command",
+    "cache_read",
+    "cache_write",
+    "html_parse",
+    "cold_start",
+    "sunshine_probe",
+    "sunshine_pair",
+)
+
+class DuoStreamLatencyHistogram:
+    """
+    Fixed-size latency histogram.
+
+    Recording a sample is a bucket search and a few counter updates, the memory
+    used never grows so it can stay enabled in production.
+    """
+
+    __slots__ = ("_buckets", "count", "errors", "total", "max")
+
+    def __init__(self):
+        self._buckets = array('Q', bytes(8 * (len(LATENCY_BUCKETS_MS) + 1)))
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, milliseconds: float, error: bool = False):
+        self._buckets[bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.max:
+            self.max = milliseconds
+        if error:
+            self.errors += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the upper bound in milliseconds of the bucket holding the given fraction of the samples."""
+        if self.count == 0:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self._buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(LATENCY_BUCKETS_MS[index], round(self.max, 1))
+                return round(self.max, 1)
+        return round(self.max, 1)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total, 1),
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 1),
+            "buckets": {
+                (f"le_{bound}" if index < len(LATENCY_BUCKETS_MS) else "overflow"): self._buckets[index]
+                for index, bound in enumerate(LATENCY_BUCKETS_MS + (None,))
+            },
+        }
+
+class DuoStreamStats:
+    """Counters and latency histograms of the I/O primitives of one DuoStream host."""
+
+    def __init__(self):
+        self._histograms: Dict[str, DuoStreamLatencyHistogram] = {
+            name: DuoStreamLatencyHistogram() for name in PRIMITIVES
+        }
+        self.last: Dict[str, float] = {}
+
+    def record(self, primitive: str, seconds: float, error: bool = False):
+        milliseconds = seconds * 1000
+        self._histograms[primitive].record(milliseconds, error)
+        self.last[primitive] = milliseconds
+
+    @contextmanager
+    def measure(self, primitive: str):
+        """Time the enclosed block, an exception escaping it is counted as an error."""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(primitive, time.perf_counter() - started, error)
+
+    def histogram(self, primitive: str) -> DuoStreamLatencyHistogram:
+        return self._histograms[primitive]
+
+    def summary(self) -> dict:
+        """Compact view used as entity attributes."""
+        return {
+            name: {
+                "count": histogram.count,
+                "errors": histogram.errors,
+                "p50_ms": histogram.percentile(0.5),
+                "p95_ms": histogram.percentile(0.95),
+            }
+            for name, histogram in self._histograms.items()
+        }
+
+    def as_dict(self) -> dict:
+        return {name: histogram.as_dict() for name, histogram in self._histograms.items()}
@@ -4,15 +4,59 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant,Event
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.helpers.event import async_track_time_interval
+from datetime import timedelta
 import os 
 
 from .DuoStreamDevice import DuoStreamDevice, DuoStreamConfiguration
+from .DuoStreamFleet import DuoStreamFleet
+from .coordinator import DuoStreamCoordinator
+from .services import async_setup_services, async_unload_services
 import asyncio
 
-from .const import DOMAIN,PLATFORMS, DOMAIN, CONF_DUO_IP_ADDRESS, CONF_DUO_PORT, CONF_DUO_HOSTNAME,CONF_DUO_CONF_NAME
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    CONF_DUO_IP_ADDRESS,
+    CONF_DUO_PORT,
+    CONF_DUO_HOSTNAME,
+    CONF_DUO_CONF_NAME,
+    CONF_DUO_MAC_ADDRESS,
+    DEFAULT_SCAN_INTERVAL,
+    DATA_FLEET,
+    FLEET_MAX_CONCURRENT_PROBES,
+    FLEET_MAX_CONCURRENT_SUBPROCESSES,
+    FLEET_STAGGER_INTERVAL,
+    FLEET_HTTP_MAX_CONNECTIONS,
+    FLEET_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+def _get_fleet(hass: HomeAssistant) -> DuoStreamFleet:
+    """Return the resources shared by every config entry, creating them for the first one."""
+    fleet = hass.data.get(DATA_FLEET)
+    if fleet is None:
+        fleet = hass.data[DATA_FLEET] = DuoStreamFleet(
+            max_concurrent_probes=FLEET_MAX_CONCURRENT_PROBES,
+            max_concurrent_subprocesses=FLEET_MAX_CONCURRENT_SUBPROCESSES,
+            http_max_connections=FLEET_HTTP_MAX_CONNECTIONS,
+            http_max_keepalive_connections=FLEET_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            stagger_interval=FLEET_STAGGER_INTERVAL,
+            stagger_period=DEFAULT_SCAN_INTERVAL,
+            logger=_LOGGER,
+        )
+    return fleet
+
+async def _release_fleet(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the host of the entry from the fleet, the fleet and the services go with the last one."""
+    fleet = hass.data.get(DATA_FLEET)
+    if fleet is not None and entry.entry_id in fleet.hosts:
+        if fleet.unregister(entry.entry_id):
+            hass.data.pop(DATA_FLEET)
+            async_unload_services(hass)
+            await fleet.close()
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     # Configuration initiale de l'intégration
     hass.data.setdefault(DOMAIN, {})
@@ -23,16 +67,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     config.duo_port = entry.data[CONF_DUO_PORT]
     config.duo_host_name = entry.data[CONF_DUO_HOSTNAME]
     config.duo_conf_name = entry.data[CONF_DUO_CONF_NAME]
+    config.mac_address = entry.data.get(CONF_DUO_MAC_ADDRESS, "")
     config.logger = _LOGGER
     config.cache_file = os.path.join(os.path.dirname(__file__),f"duostream_sessions_cache.json")
 
-    entry.duo_device = DuoStreamDevice(configuration=config)
+    fleet = _get_fleet(hass)
+    first_poll_delay = fleet.register(entry.entry_id)
+    entry.duo_device = DuoStreamDevice(configuration=config, fleet=fleet)
     entry.duo_config = config
 
     ## Fill the cache 
     loop = asyncio.get_running_loop()
     sessions = await loop.run_in_executor(None, entry.duo_device.read_cached_sessions)
 
+    # One refresh cycle per config entry, shared by every entity.
+    # Entities are created from the cache right away, unavailable until the host is probed in the background
+    coordinator = DuoStreamCoordinator(hass, entry.duo_device, config)
+    coordinator.async_set_updated_data(entry.duo_device.get_cached_snapshot())
+    entry.duo_coordinator = coordinator
+
 
     async def handle_shutdown(event:Event):
         """
@@ -46,14 +99,37 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 loop = asyncio.get_running_loop()
                 await loop.run_in_executor(None, entry.duo_device.write_session_cache)
                 _LOGGER.info(f"Sessions cache saved for {DOMAIN} during shutdown")
+                await entry.duo_device.close()
+                await _release_fleet(hass, entry)
         
         except Exception as err:
             _LOGGER.error(f"Error during {DOMAIN} shutdown: {err}")
 
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, handle_shutdown)
+    # Unsubscribed on unload, the handler of a reloaded entry must not write its stale device
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, handle_shutdown))
     
+    async_setup_services(hass)
+
+    # The Sunshine endpoints are probed on their own interval, decoupled from the main poll
+    entry.async_on_unload(async_track_time_interval(
+        hass,
+        coordinator.async_probe_sunshine,
+        timedelta(seconds=config.sunshine_probe_interval),
+        name=f"{DOMAIN} {config.duo_conf_name} Sunshine probe",
+    ))
+
     # Configuration des plateformes
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    async def initial_refresh():
+        # Staggered so that the hosts of the fleet do not all poll at once
+        await asyncio.sleep(first_poll_delay)
+        await coordinator.async_refresh()
+        await coordinator.async_probe_sunshine()
+
+    entry.async_create_background_task(
+        hass, initial_refresh(), f"{DOMAIN} {config.duo_conf_name} initial refresh"
+    )
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
@@ -66,6 +142,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
+        await device.close()
+        await _release_fleet(hass, entry)
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
 
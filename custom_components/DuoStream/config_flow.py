@@ -1,16 +1,25 @@
 # Flux de configuration pour ajouter l'appareil
 import voluptuous as vol
 from homeassistant.config_entries import ConfigFlow
-from .const import DOMAIN, CONF_DUO_IP_ADDRESS, CONF_DUO_PORT, CONF_DUO_HOSTNAME,CONF_DUO_CONF_NAME
+from .const import DOMAIN, CONF_DUO_IP_ADDRESS, CONF_DUO_PORT, CONF_DUO_HOSTNAME,CONF_DUO_CONF_NAME,CONF_DUO_MAC_ADDRESS
+from .DuoStreamDevice import parse_mac_address
 
 class DuoStreamConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            # Validation et création de l'entrée
-            return self.async_create_entry(
-                title=user_input[CONF_DUO_CONF_NAME], 
-                data=user_input
-            )
+            # The MAC address is optional, it is only needed to wake the computer
+            try:
+                if user_input.get(CONF_DUO_MAC_ADDRESS):
+                    parse_mac_address(user_input[CONF_DUO_MAC_ADDRESS])
+            except ValueError:
+                errors[CONF_DUO_MAC_ADDRESS] = "invalid_mac_address"
+            if not errors:
+                # Validation et création de l'entrée
+                return self.async_create_entry(
+                    title=user_input[CONF_DUO_CONF_NAME], 
+                    data=user_input
+                )
         
         return self.async_show_form(
             step_id="user",
@@ -18,6 +27,8 @@ class DuoStreamConfigFlow(ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_DUO_CONF_NAME): str,
                 vol.Required(CONF_DUO_IP_ADDRESS): str,
                 vol.Required(CONF_DUO_PORT): str,
-                vol.Required(CONF_DUO_HOSTNAME): str
-            })
+                vol.Required(CONF_DUO_HOSTNAME): str,
+                vol.Optional(CONF_DUO_MAC_ADDRESS, default=""): str
+            }),
+            errors=errors
         )
\ No newline at end of file
@@ -6,4 +6,32 @@ PLATFORMS: list[Platform] = [Platform.SWITCH,Platform.SENSOR]
 CONF_DUO_IP_ADDRESS = "duo_ip_address"
 CONF_DUO_PORT = "duo_port"
 CONF_DUO_HOSTNAME = "duo_host_name"
-CONF_DUO_CONF_NAME = "configuration_name"
\ No newline at end of file
+CONF_DUO_CONF_NAME = "configuration_name"
+CONF_DUO_MAC_ADDRESS = "mac_address"
+DEFAULT_SCAN_INTERVAL = 30  # seconds
+MAX_SCAN_INTERVAL = 300  # seconds, cap of the backoff while the host is unreachable
+BURST_SCAN_INTERVAL = 2  # seconds, fast polling right after a command
+BURST_DURATION = 20  # seconds
+SCAN_JITTER = 0.1  # +/- fraction of the interval, spreads the polls of several hosts
+
+# Resources shared by every config entry, see DuoStreamFleet
+DATA_FLEET = f"{DOMAIN}_fleet"
+FLEET_MAX_CONCURRENT_PROBES = 8
+FLEET_MAX_CONCURRENT_SUBPROCESSES = 2  # ping and ssh processes running at once across all hosts
+FLEET_STAGGER_INTERVAL = 2  # seconds between the first polls of two hosts
+# HTTP pool shared by every host, replaces the per-host limits of DuoStreamConfiguration
+FLEET_HTTP_MAX_CONNECTIONS = 32
+FLEET_HTTP_MAX_KEEPALIVE_CONNECTIONS = 16
+
+# Services
+SERVICE_START_SESSION_FROM_COLD = "start_session_from_cold"
+SERVICE_START_SESSIONS = "start_sessions"
+SERVICE_STOP_SESSIONS = "stop_sessions"
+SERVICE_PAIR_CLIENT = "pair_client"
+ATTR_SESSION = "session"
+ATTR_SESSIONS = "sessions"
+ATTR_PIN = "pin"
+ATTR_CLIENT_NAME = "client_name"
+ATTR_SUNSHINE_USER = "sunshine_user"
+ATTR_SUNSHINE_PASSWORD = "sunshine_password"
+EVENT_COLD_START_PROGRESS = "duostream_cold_start_progress"
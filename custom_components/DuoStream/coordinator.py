@@ -0,0 +1,131 @@
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Dict, Iterable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    MAX_SCAN_INTERVAL,
+    BURST_SCAN_INTERVAL,
+    BURST_DURATION,
+    SCAN_JITTER,
+)
+from .DuoStreamDevice import DuoStreamDevice, DuoStreamConfiguration, DuoStreamSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+class DuoStreamPollScheduler:
+    """
+    Choose the delay before the next refresh of a host.
+
+    The interval doubles on every refresh that finds the host unreachable, up to
+    `max_interval`, and drops to `burst_interval` for `burst_duration` seconds
+    after a command so its effect shows up quickly. A random jitter keeps several
+    hosts from polling in lockstep.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_SCAN_INTERVAL,
+        max_interval: float = MAX_SCAN_INTERVAL,
+        burst_interval: float = BURST_SCAN_INTERVAL,
+        burst_duration: float = BURST_DURATION,
+        jitter: float = SCAN_JITTER,
+    ):
+        self._interval = interval
+        self._max_interval = max_interval
+        self._burst_interval = burst_interval
+        self._burst_duration = burst_duration
+        self._jitter = jitter
+        self._offline_refreshes = 0
+        self._burst_until = 0.0
+
+    def record_refresh(self, host_online: bool):
+        self._offline_refreshes = 0 if host_online else self._offline_refreshes + 1
+
+    def start_burst(self):
+        self._burst_until = time.monotonic() + self._burst_duration
+
+    @property
+    def in_burst(self) -> bool:
+        return time.monotonic() < self._burst_until
+
+    def next_interval(self) -> float:
+        """Return the seconds to wait before the next refresh."""
+        if self.in_burst:
+            return self._burst_interval
+        interval = self._interval
+        if self._offline_refreshes > 1:
+            # The first miss may be a blip, back off from the second one on
+            interval = min(self._interval * 2 ** min(self._offline_refreshes - 1, 16), self._max_interval)
+        return interval * (1 + random.uniform(-self._jitter, self._jitter))
+
+class DuoStreamCoordinator(DataUpdateCoordinator[DuoStreamSnapshot]):
+    """
+    Poll a DuoStream host once per cycle for every entity of the config entry.
+
+    Switches and sensors read the shared DuoStreamSnapshot instead of probing
+    the host themselves, so the probe cost does not grow with the number of sessions.
+    """
+
+    def __init__(self, hass: HomeAssistant, device: DuoStreamDevice, config: DuoStreamConfiguration):
+        self.scheduler = DuoStreamPollScheduler()
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {config.duo_conf_name}",
+            update_interval=timedelta(seconds=self.scheduler.next_interval()),
+        )
+        self.device = device
+        self.config = config
+        # Status of the sessions confirmed by a batch command, shown until the next refresh
+        self.confirmed_sessions: Dict[str, bool] = {}
+
+    async def _async_update_data(self) -> DuoStreamSnapshot:
+        try:
+            snapshot = await self.device.get_snapshot()
+        finally:
+            self.confirmed_sessions = {}
+        self.scheduler.record_refresh(snapshot.host_online)
+        self.update_interval = timedelta(seconds=self.scheduler.next_interval())
+        return snapshot
+
+    async def async_probe_sunshine(self, now=None):
+        """
+        Probe the Sunshine endpoint of the running sessions and notify the entities.
+
+        Scheduled on its own, slower interval: the main poll stays cheap and a
+        hung instance still shows up as unresponsive while it reports running.
+        """
+        snapshot = self.data
+        if snapshot is None or not snapshot.service_running:
+            return
+        running = [session_name for session_name in snapshot.sessions if snapshot.session_status(session_name)]
+        if not running and not self.device.sunshine_health:
+            return
+        await self.device.probe_sunshine_endpoints(running)
+        self.async_update_listeners()
+
+    async def async_command_sent(self):
+        """Refresh now and keep polling fast for a while so the command result shows up quickly."""
+        self.scheduler.start_burst()
+        self.update_interval = timedelta(seconds=self.scheduler.next_interval())
+        await self.async_request_refresh()
+
+    async def async_sessions_changed(self, new_status: bool, session_names: Iterable[str]):
+        """
+        Show the sessions confirmed by a batch command, then refresh once for the whole batch.
+
+        The refresh is not debounced: the cooldown left by an earlier command would
+        hold it back and leave the switches stale until the next poll.
+        """
+        self.confirmed_sessions = dict.fromkeys(session_names, new_status)
+        self.async_update_listeners()
+        self.scheduler.start_burst()
+        self.update_interval = timedelta(seconds=self.scheduler.next_interval())
+        await self.async_refresh()
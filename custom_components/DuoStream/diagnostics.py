@@ -0,0 +1,40 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_DUO_IP_ADDRESS, CONF_DUO_HOSTNAME, CONF_DUO_MAC_ADDRESS
+
+TO_REDACT = {CONF_DUO_IP_ADDRESS, CONF_DUO_HOSTNAME, CONF_DUO_MAC_ADDRESS}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the state and I/O statistics of a DuoStream config entry."""
+    coordinator = entry.duo_coordinator
+    snapshot = coordinator.data
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "snapshot": {
+            "host_online": snapshot.host_online,
+            "service_running": snapshot.service_running,
+            "sessions": dict(snapshot.instances) if snapshot.instances else list(snapshot.sessions),
+            "version": snapshot.version,
+            "circuit_state": snapshot.circuit_state,
+            "service_circuit_state": entry.duo_device.service_circuit_state,
+            "revision": snapshot.revision,
+            "fetched_at": snapshot.fetched_at,
+        },
+        "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+        "sunshine_health": {
+            session_name: {"responsive": health.responsive, "latency_ms": health.latency_ms, "status_code": health.status_code}
+            for session_name, health in entry.duo_device.sunshine_health.items()
+        },
+        "performance": entry.duo_device.stats.as_dict(),
+        "history": {
+            "events": len(entry.duo_device.history),
+            "active_sessions": entry.duo_device.history.active_count,
+            "starts": entry.duo_device.history.starts,
+            "stops": entry.duo_device.history.stops,
+            "start_latency_p50": entry.duo_device.history.start_latency(0.5),
+            "start_latency_p95": entry.duo_device.history.start_latency(0.95),
+        },
+    }
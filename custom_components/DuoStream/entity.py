@@ -0,0 +1,44 @@
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+class DuoStreamEntity(CoordinatorEntity):
+    """
+    Coordinator entity that writes its state only when its own value changed.
+
+    Every refresh of the host notifies all the entities of the config entry,
+    most of them see the same state, availability and attributes as before.
+    Skipping those writes saves the state_changed events and recorder rows.
+
+    Entities whose state is read from the snapshot only set `_state_from_snapshot`,
+    they skip the comparison when the snapshot revision did not change.
+
+    Entities are unavailable until the first live refresh, the snapshot built
+    from the cache at startup does not know the state of the host.
+    """
+
+    _state_from_snapshot = False
+    _written_state = None
+    _written_revision = None
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.data.live
+
+    def _current_state(self):
+        return (self.available, self.state, self.extra_state_attributes)
+
+    def _current_revision(self):
+        return (self.coordinator.data.revision, self.coordinator.last_update_success)
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._written_state = self._current_state()
+        self._written_revision = self._current_revision()
+        super().async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._state_from_snapshot and self._current_revision() == self._written_revision:
+            return
+        if self._current_state() != self._written_state:
+            self.async_write_ha_state()
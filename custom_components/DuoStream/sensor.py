@@ -1,25 +1,37 @@
 # Gestion des capteurs pour suivre l'état des sessions
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import UnitOfTime
 from homeassistant.helpers.device_registry import DeviceEntryType
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from .const import DOMAIN
+from .entity import DuoStreamEntity
 from .DuoStreamDevice import DuoStreamDevice, DuoStreamConfiguration
+from .DuoStreamStats import PRIMITIVES
 import asyncio
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
 
-    device = config_entry.duo_device
+    coordinator = config_entry.duo_coordinator
     config = config_entry.duo_config 
 
     sensors = [
-        DuoStreamServiceSensor(device,config),
-        DuoStreamSessionsSensor(device,config)
+        DuoStreamServiceSensor(coordinator,config),
+        DuoStreamSessionsSensor(coordinator,config),
+        DuoStreamPerformanceSensor(coordinator,config),
+        DuoStreamActiveSessionsSensor(coordinator,config),
+        DuoStreamSessionRuntimeSensor(coordinator,config),
+        DuoStreamStartLatencySensor(coordinator,config)
     ]
     
-    async_add_entities(sensors,True)
+    async_add_entities(sensors)
 
 
-class DuoStreamSensor(SensorEntity):
+class DuoStreamSensor(DuoStreamEntity, SensorEntity):
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator)
+        self._device = coordinator.device
+        self._config = config
     
     @property
     def device_info(self):
@@ -33,17 +45,16 @@ class DuoStreamSensor(SensorEntity):
         )
 
 class DuoStreamServiceSensor(DuoStreamSensor):
-    
-    def __init__(self, device, config):
-        self._device = device
-        self._config = config
-        self._state = None
+    _state_from_snapshot = True
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator, config)
         self._icon = "mdi:desktop-tower"
         self._attr_unique_id = f"{self._config.duo_conf_name}_computer_status"  
     
     @property
     def state(self):
-        return self._state
+        return "Online" if self.coordinator.data.host_online is True else "Offline"
     
     @property
     def icon(self):
@@ -53,32 +64,119 @@ class DuoStreamServiceSensor(DuoStreamSensor):
         """
         return self._icon
 
-    async def async_update(self):
-        self._state = "Online" if await self._device.get_power_status_computer() is True else "Offline"
+    @property
+    def extra_state_attributes(self):
+        # Publish the circuit breaker state, "open" means the host is known to be down
+        return {
+            "circuit_state": self.coordinator.data.circuit_state
+        }
 
 
 class DuoStreamSessionsSensor(DuoStreamSensor):
-    def __init__(self, device, config):
-        self._device = device
-        self._config = config
-        self._sessions = []
+    _state_from_snapshot = True
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator, config)
         self._attr_unique_id = f"{self._config.duo_conf_name}_available_sessions"  
             
     @property
     def state(self):
         # Return the total number of sessions
-        return len(self._sessions)
+        return len(self.coordinator.data.sessions)
     
     @property
     def extra_state_attributes(self):
         # Provide the list of available sessions as an attribute
         return {
-            "available_sessions": self._sessions
+            "available_sessions": list(self.coordinator.data.sessions)
         }
-    
-    async def async_update(self):
-        # Update the list of available sessions
-        self._sessions = await self._device.get_sessions_available()
 
 
+class DuoStreamPerformanceSensor(DuoStreamSensor):
+    """Duration of the last refresh cycle, with per I/O primitive latencies as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = "ms"
+    _attr_icon = "mdi:timer-outline"
+    # The latencies change on every refresh, keep them out of the recorder
+    _unrecorded_attributes = frozenset(PRIMITIVES)
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator, config)
+        self._attr_unique_id = f"{self._config.duo_conf_name}_performance"
+
+    @property
+    def native_value(self):
+        last = self._device.stats.last.get("refresh_cycle")
+        return round(last, 1) if last is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        return self._device.stats.summary()
+
+
+class DuoStreamActiveSessionsSensor(DuoStreamSensor):
+    """Number of sessions running, from the usage history."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:monitor-multiple"
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator, config)
+        self._attr_unique_id = f"{self._config.duo_conf_name}_active_sessions"
 
+    @property
+    def native_value(self):
+        return self._device.history.active_count
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "starts": self._device.history.starts,
+            "stops": self._device.history.stops
+        }
+
+
+class DuoStreamSessionRuntimeSensor(DuoStreamSensor):
+    """Cumulative time the sessions ran, the running ones included."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_suggested_display_precision = 2
+    _attr_icon = "mdi:timer-play-outline"
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator, config)
+        self._attr_unique_id = f"{self._config.duo_conf_name}_session_runtime"
+
+    @property
+    def native_value(self):
+        # Rounded to 36 seconds, a running session does not rewrite the state on every refresh
+        return round(self._device.history.runtime() / 3600, 2)
+
+
+class DuoStreamStartLatencySensor(DuoStreamSensor):
+    """Median time from a start command to the session running, p95 as attribute."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_icon = "mdi:timer-sand"
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator, config)
+        self._attr_unique_id = f"{self._config.duo_conf_name}_start_latency"
+
+    @property
+    def native_value(self):
+        return self._device.history.start_latency(0.5)
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "p95": self._device.history.start_latency(0.95),
+            "samples": self._device.history.start_latency_samples
+        }
@@ -0,0 +1,192 @@
+# Services de l'intégration, communs à toutes les configurations
+import logging
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    DOMAIN,
+    CONF_DUO_CONF_NAME,
+    ATTR_SESSION,
+    ATTR_SESSIONS,
+    ATTR_PIN,
+    ATTR_CLIENT_NAME,
+    ATTR_SUNSHINE_USER,
+    ATTR_SUNSHINE_PASSWORD,
+    SERVICE_START_SESSION_FROM_COLD,
+    SERVICE_START_SESSIONS,
+    SERVICE_STOP_SESSIONS,
+    SERVICE_PAIR_CLIENT,
+    EVENT_COLD_START_PROGRESS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+START_SESSION_FROM_COLD_SCHEMA = vol.Schema({
+    vol.Required(CONF_DUO_CONF_NAME): cv.string,
+    vol.Required(ATTR_SESSION): cv.string,
+})
+
+SESSIONS_SCHEMA = vol.Schema({
+    vol.Required(CONF_DUO_CONF_NAME): cv.string,
+    # All the sessions of the host when omitted
+    vol.Optional(ATTR_SESSIONS): vol.All(cv.ensure_list, [cv.string]),
+})
+
+PAIR_CLIENT_SCHEMA = vol.Schema({
+    vol.Required(CONF_DUO_CONF_NAME): cv.string,
+    vol.Required(ATTR_PIN): vol.All(cv.string, vol.Match(r"^\d{4}$")),
+    vol.Required(ATTR_CLIENT_NAME): cv.string,
+    vol.Required(ATTR_SUNSHINE_USER): cv.string,
+    vol.Required(ATTR_SUNSHINE_PASSWORD): cv.string,
+    # All the sessions of the host when omitted
+    vol.Optional(ATTR_SESSIONS): vol.All(cv.ensure_list, [cv.string]),
+})
+
+def _get_entry(hass: HomeAssistant, conf_name: str) -> ConfigEntry:
+    """Return the loaded config entry of a configuration name."""
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        # An unloaded entry keeps its attributes, its device is closed
+        if entry.state is not ConfigEntryState.LOADED or getattr(entry, "duo_config", None) is None:
+            continue
+        if entry.duo_config.duo_conf_name == conf_name:
+            return entry
+    raise HomeAssistantError(f"No loaded {DOMAIN} configuration named {conf_name}")
+
+async def _async_start_session_from_cold(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    entry = _get_entry(hass, call.data[CONF_DUO_CONF_NAME])
+    session_name = call.data[ATTR_SESSION]
+    if not entry.duo_config.mac_address:
+        raise HomeAssistantError(f"No MAC address configured for {entry.duo_config.duo_conf_name}")
+
+    def progress(stage: str, elapsed: float):
+        hass.bus.async_fire(EVENT_COLD_START_PROGRESS, {
+            CONF_DUO_CONF_NAME: entry.duo_config.duo_conf_name,
+            ATTR_SESSION: session_name,
+            "stage": stage,
+            "elapsed": elapsed,
+        })
+
+    result = await entry.duo_device.start_session_from_cold(session_name, progress)
+    # Show the woken host and the started session without waiting for the next poll
+    await entry.duo_coordinator.async_command_sent()
+
+    if not result.success:
+        _LOGGER.warning(f"Cold start of {session_name} failed during stage {result.stage}: {result.error}")
+        if not call.return_response:
+            raise HomeAssistantError(f"Cold start of {session_name} failed during stage {result.stage}: {result.error}")
+    return result.as_dict()
+
+def _get_session_names(entry: ConfigEntry, call: ServiceCall) -> list:
+    """Return the sessions named in the call, all the sessions of the host when none is."""
+    known_sessions = entry.duo_coordinator.data.sessions
+    session_names = call.data.get(ATTR_SESSIONS) or list(known_sessions)
+    unknown = [session_name for session_name in session_names if session_name not in known_sessions]
+    if unknown:
+        raise HomeAssistantError(f"Unknown sessions for {entry.duo_config.duo_conf_name}: {', '.join(unknown)}")
+    return session_names
+
+def _session_results(errors: dict) -> dict:
+    failed = sum(1 for error in errors.values() if error is not None)
+    return {
+        "sessions": {
+            session_name: {"success": error is None, "error": error}
+            for session_name, error in errors.items()
+        },
+        "succeeded": len(errors) - failed,
+        "failed": failed,
+    }
+
+async def _async_change_sessions(hass: HomeAssistant, call: ServiceCall, new_status: bool) -> ServiceResponse:
+    entry = _get_entry(hass, call.data[CONF_DUO_CONF_NAME])
+    session_names = _get_session_names(entry, call)
+
+    errors = await entry.duo_device.change_sessions_status(new_status, session_names)
+    # One refresh for the whole batch
+    await entry.duo_coordinator.async_sessions_changed(
+        new_status,
+        [session_name for session_name, error in errors.items() if error is None]
+    )
+
+    failed = {session_name: error for session_name, error in errors.items() if error is not None}
+    if failed and not call.return_response:
+        raise HomeAssistantError(
+            f"{len(failed)} of {len(errors)} sessions did not turn {'on' if new_status else 'off'}: "
+            + "; ".join(failed.values())
+        )
+    return _session_results(errors)
+
+async def _async_pair_client(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    entry = _get_entry(hass, call.data[CONF_DUO_CONF_NAME])
+    session_names = _get_session_names(entry, call)
+    client_name = call.data[ATTR_CLIENT_NAME]
+
+    errors = await entry.duo_device.append_new_device_pin(
+        session_names,
+        call.data[ATTR_PIN],
+        client_name,
+        call.data[ATTR_SUNSHINE_USER],
+        call.data[ATTR_SUNSHINE_PASSWORD],
+    )
+
+    failed = {session_name: error for session_name, error in errors.items() if error is not None}
+    if failed and not call.return_response:
+        raise HomeAssistantError(
+            f"{client_name} was not paired with {len(failed)} of {len(errors)} sessions: "
+            + "; ".join(failed.values())
+        )
+    return _session_results(errors)
+
+def async_setup_services(hass: HomeAssistant):
+    """Register the services once, they dispatch on the configuration name."""
+    if hass.services.has_service(DOMAIN, SERVICE_START_SESSION_FROM_COLD):
+        return
+
+    async def start_session_from_cold(call: ServiceCall) -> ServiceResponse:
+        return await _async_start_session_from_cold(hass, call)
+
+    async def start_sessions(call: ServiceCall) -> ServiceResponse:
+        return await _async_change_sessions(hass, call, True)
+
+    async def stop_sessions(call: ServiceCall) -> ServiceResponse:
+        return await _async_change_sessions(hass, call, False)
+
+    async def pair_client(call: ServiceCall) -> ServiceResponse:
+        return await _async_pair_client(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_SESSION_FROM_COLD,
+        start_session_from_cold,
+        schema=START_SESSION_FROM_COLD_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_SESSIONS,
+        start_sessions,
+        schema=SESSIONS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_SESSIONS,
+        stop_sessions,
+        schema=SESSIONS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PAIR_CLIENT,
+        pair_client,
+        schema=PAIR_CLIENT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+def async_unload_services(hass: HomeAssistant):
+    """Remove the services, called when the last config entry is unloaded."""
+    for service in (SERVICE_START_SESSION_FROM_COLD, SERVICE_START_SESSIONS, SERVICE_STOP_SESSIONS, SERVICE_PAIR_CLIENT):
+        hass.services.async_remove(DOMAIN, service)
@@ -1,30 +1,70 @@
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import DeviceInfo
 from .const import DOMAIN
+from .entity import DuoStreamEntity
 from .DuoStreamDevice import DuoStreamDevice, DuoStreamConfiguration
+import time
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
 
-    device = config_entry.duo_device 
+    coordinator = config_entry.duo_coordinator
     config = config_entry.duo_config 
 
-    sessions = await device.get_sessions_available()
-    # Create switches with device information
-    switches = []
-    for session in sessions:
-        switches.append(DuoStreamSessionSwitch(device, session, config))
+    # Session switches currently registered, by session name
+    session_switches = {}
+    known_sessions = None
+    known_revision = None
 
-    switches.append(DuoStreamSwitch(device,config))
-    
-    async_add_entities(switches, True)
+    @callback
+    def async_reconcile_sessions():
+        """Add switches for new sessions and retire the ones of removed sessions."""
+        nonlocal known_sessions, known_revision
+        if coordinator.data.revision == known_revision:
+            return
+        known_revision = coordinator.data.revision
+        sessions = coordinator.data.sessions
+        # Only a list read from a running service is authoritative, the cached one is kept as is
+        if sessions == known_sessions or (known_sessions is not None and not coordinator.data.service_running):
+            return
+        known_sessions = sessions
+
+        current = set(sessions)
+        for session in [name for name in session_switches if name not in current]:
+            switch = session_switches.pop(session)
+            # The registry entry is kept with the name, area and customizations given by the user,
+            # a session missing from one page gets them back when it returns. A session deleted for
+            # good leaves an unavailable entity the user can remove
+            if switch.hass is not None:
+                hass.async_create_task(switch.async_remove())
+
+        # Create switches with device information
+        switches = []
+        for session in sessions:
+            if session not in session_switches:
+                session_switches[session] = DuoStreamSessionSwitch(coordinator, session, config)
+                switches.append(session_switches[session])
+        if switches:
+            async_add_entities(switches)
+
+    async_reconcile_sessions()
+    async_add_entities([DuoStreamSwitch(coordinator,config)])
+    config_entry.async_on_unload(coordinator.async_add_listener(async_reconcile_sessions))
 
-class DuoStreamSwitch(SwitchEntity):
-    def __init__(self, device, config):
-        self._device = device
+class DuoStreamSwitch(DuoStreamEntity, SwitchEntity):
+    _state_from_snapshot = True
+
+    def __init__(self, coordinator, config):
+        super().__init__(coordinator)
+        self._device = coordinator.device
         self._config = config
-        self._is_on = None
         self._attr_unique_id = f"{self._config.duo_conf_name}_service_switch"  
+        # State shown while a command is in flight, until a refresh reports the real one
+        self._optimistic_state = None
+        self._command_pending = False
+        self._last_command_latency = None
       
     @property
     def device_info(self):
@@ -39,36 +79,94 @@ class DuoStreamSwitch(SwitchEntity):
     
     @property
     def is_on(self):
-        return self._is_on
+        if self._optimistic_state is not None:
+            return self._optimistic_state
+        return self._coordinator_state()
+
+    def _coordinator_state(self):
+        return self.coordinator.data.service_running
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "last_command_latency": self._last_command_latency
+        }
     
     async def async_turn_on(self, **kwargs):
-        await self._device.activate_duo_stream_service(True)
+        await self._async_send_command(True)
     
     async def async_turn_off(self, **kwargs):
-        await self._device.activate_duo_stream_service( False)
-    
-    async def async_update(self):
-        self._is_on = await self._device.get_duostream_service_status()
+        await self._async_send_command(False)
+
+    async def _async_execute_command(self, new_status: bool) -> bool:
+        """Send the command and wait until the host confirms it."""
+        if not await self._device.activate_duo_stream_service(new_status):
+            return False
+        return await self._device.wait_for_service_status(new_status)
+
+    async def _async_send_command(self, new_status: bool):
+        """
+        Show the requested state right away, then confirm it on the host.
+
+        The state is rolled back and an error raised if the host does not reach it.
+        """
+        self._optimistic_state = new_status
+        self._command_pending = True
+        self.async_write_ha_state()
+
+        started = time.monotonic()
+        try:
+            confirmed = await self._async_execute_command(new_status)
+        finally:
+            self._command_pending = False
+
+        if not confirmed:
+            self._optimistic_state = None
+            self.async_write_ha_state()
+            raise HomeAssistantError(f"{self.entity_id} did not turn {'on' if new_status else 'off'}")
+
+        self._last_command_latency = round(time.monotonic() - started, 3)
+        self.async_write_ha_state()
+        await self.coordinator.async_command_sent()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if not self._command_pending:
+            self._optimistic_state = None
+        super()._handle_coordinator_update()
 
 class DuoStreamSessionSwitch(DuoStreamSwitch):
-    def __init__(self, device, session_name, config):
-        self._device = device
+    # The Sunshine health is probed apart from the snapshot
+    _state_from_snapshot = False
+    # The latency changes on every Sunshine probe, keep it out of the recorder
+    _unrecorded_attributes = frozenset({"sunshine_latency_ms"})
+
+    def __init__(self, coordinator, session_name, config):
+        super().__init__(coordinator, config)
         self._session_name = session_name
-        self._config = config
-        self._is_on = None
         self._attr_unique_id = f"{self._config.duo_conf_name}_session_{self._session_name}"
 
-    
+    def _coordinator_state(self):
+        confirmed = self.coordinator.confirmed_sessions.get(self._session_name)
+        if confirmed is not None:
+            return confirmed
+        return self.coordinator.data.session_status(self._session_name)
+
     @property
-    def is_on(self):
-        return self._is_on
-    
-    async def async_turn_on(self, **kwargs):
-        await self._device.change_session_status(self._session_name, True)
-    
-    async def async_turn_off(self, **kwargs):
-        await self._device.change_session_status(self._session_name, False)
-    
-    async def async_update(self):
-        self._is_on = await self._device.get_session_status(self._session_name)
-        
\ No newline at end of file
+    def extra_state_attributes(self):
+        # Unknown until the Sunshine endpoint of the running session has been probed
+        health = self._device.sunshine_health.get(self._session_name)
+        return {
+            **super().extra_state_attributes,
+            "sunshine_responsive": health.responsive if health is not None else None,
+            "sunshine_latency_ms": health.latency_ms if health is not None else None,
+        }
+
+    async def _async_execute_command(self, new_status: bool) -> bool:
+        started = time.monotonic()
+        if not await self._device.change_session_status(self._session_name, new_status):
+            return False
+        if not await self._device.wait_for_session_status(self._session_name, new_status):
+            return False
+        self._device.record_session_command(self._session_name, new_status, time.monotonic() - started)
+        return True
@@ -18,6 +18,8 @@ class DuoStreamCard extends HTMLElement {
     }
     Object.preventExtensions(this._config)
     this._activeSessions = [];
+    // States of the entities last rendered, by entity id
+    this._trackedStates = null;
   }
 
   // Set hass when Home Assistant connects
@@ -28,8 +30,67 @@ class DuoStreamCard extends HTMLElement {
       this._createCard();
     }
 
+    // Home Assistant calls this setter on every state change of the instance,
+    // render only when one of the entities shown by the card changed
+    if (!this._hasChanged(hass)) {
+      return;
+    }
+
     this._updateCard();
   }
+
+  // Entity id of the switch of a session
+  _sessionEntityId(session) {
+    const formattedSession = session.toLowerCase().replaceAll(" ", "_").replaceAll("-", "_");
+    return `switch.duostream_${this._config.formated_configuration_name}_session_${formattedSession}`;
+  }
+
+  // Entity ids read by the card
+  _dependentEntityIds(hass) {
+    const entityIds = [
+      this._config.pc_entity,
+      this._config.service_entity,
+      this._config.sessions_sensor,
+      this._config.wake_on_lan_entity
+    ];
+    const sessionsState = hass.states[this._config.sessions_sensor];
+    const sessions = sessionsState ? sessionsState.attributes.available_sessions || [] : [];
+    sessions.forEach(session => entityIds.push(this._sessionEntityId(session)));
+    return entityIds;
+  }
+
+  // Home Assistant replaces the state object of an entity when it changes, comparing references is enough
+  _hasChanged(hass) {
+    const entityIds = this._dependentEntityIds(hass);
+    const previous = this._trackedStates;
+
+    let changed = !previous || previous.size !== entityIds.length || this._devices !== hass.devices;
+    for (let i = 0; !changed && i < entityIds.length; i++) {
+      changed = !previous.has(entityIds[i]) || previous.get(entityIds[i]) !== hass.states[entityIds[i]];
+    }
+    if (!changed) {
+      return false;
+    }
+
+    this._trackedStates = new Map(entityIds.map(entityId => [entityId, hass.states[entityId]]));
+    return true;
+  }
+
+  // Device lookup, only redone when the device registry changed
+  _deviceExists() {
+    if (this._devices !== this._hass.devices) {
+      this._devices = this._hass.devices;
+      this._deviceFound = this._checkDeviceExists(this._devices, this._config.device_name);
+    }
+    return this._deviceFound;
+  }
+
+  // Set the text of a node only when it differs
+  _setText(element, text) {
+    if (element.textContent !== text) {
+      element.textContent = text;
+    }
+  }
    _checkDeviceExists(devices, argument) {
     if (!devices || typeof devices !== 'object' || devices === null) {
       return false;
@@ -69,12 +130,7 @@ class DuoStreamCard extends HTMLElement {
     this._theme = theme
 
     const card = document.createElement('ha-card');
-    if (this._checkDeviceExists(this._hass.devices,this._config.device_name ) == false)
-    {
-      card.header = `Invalid Device Name`;
-    }else {
-      card.header = `DuoStream Control ${this._config.device_name}`;
-    }
+    card.header = this._deviceExists() ? `DuoStream Control ${this._config.device_name}` : `Invalid Device Name`;
     // Set card background if in dark mode
     if (this._theme.cardBg) {
       card.style.backgroundColor = this._theme.cardBg;
@@ -206,10 +262,29 @@ class DuoStreamCard extends HTMLElement {
 
     // Active Sessions Container - Scroll View
     const activeSessionsLabel = document.createElement('div');
-    activeSessionsLabel.textContent = 'Active Sessions:';
+    activeSessionsLabel.style.display = 'flex';
+    activeSessionsLabel.style.justifyContent = 'space-between';
+    activeSessionsLabel.style.alignItems = 'center';
     activeSessionsLabel.style.marginBottom = '8px';
     activeSessionsLabel.style.marginTop = '12px';
 
+    const activeSessionsTitle = document.createElement('span');
+    activeSessionsTitle.textContent = 'Active Sessions:';
+
+    // Stops every active session with a single service call
+    this._stopAllButton = document.createElement('button');
+    this._stopAllButton.textContent = 'Stop all';
+    this._stopAllButton.style.backgroundColor = '#f44336';
+    this._stopAllButton.style.color = 'white';
+    this._stopAllButton.style.border = 'none';
+    this._stopAllButton.style.borderRadius = '8px';
+    this._stopAllButton.style.padding = '4px 10px';
+    this._stopAllButton.style.cursor = 'pointer';
+    this._stopAllButton.style.display = 'none';
+
+    activeSessionsLabel.appendChild(activeSessionsTitle);
+    activeSessionsLabel.appendChild(this._stopAllButton);
+
     this._activeSessionsContainer = document.createElement('div');
     this._activeSessionsContainer.style.maxHeight = '100px'; // Height for 2 items + scroll
     this._activeSessionsContainer.style.overflowY = 'auto';
@@ -218,6 +293,15 @@ class DuoStreamCard extends HTMLElement {
     this._activeSessionsContainer.style.borderRadius = '8px';
     this._activeSessionsContainer.style.marginBottom = '12px';
 
+    // Rows of the active sessions by session name, kept between updates
+    this._activeSessionItems = new Map();
+
+    this._noActiveSessions = document.createElement('div');
+    this._noActiveSessions.textContent = 'No active sessions';
+    this._noActiveSessions.style.padding = '10px';
+    this._noActiveSessions.style.textAlign = 'center';
+    this._noActiveSessions.style.color = this._theme.subtitleColor;
+
 
     // Session selector
     const sessionSelector = document.createElement('div');
@@ -286,6 +370,11 @@ class DuoStreamCard extends HTMLElement {
       activeColor: '#5e34a0',  // Couleur quand cliqué
       disabledColor: '#cccccc' // Couleur quand désactivé
     });
+    this._stopAllButton.cleanup = this._addButtonClickEffect(this._stopAllButton, {
+      normalColor: '#f44336',
+      activeColor: '#d32f2f',
+      disabledColor: '#cccccc'
+    });
 
     content.appendChild(statusRow);
     content.appendChild(buttonsContainer);
@@ -295,71 +384,83 @@ class DuoStreamCard extends HTMLElement {
     this._wakeButton.addEventListener('click', () => this._toggleWakeOnLan());
     this._serviceButton.addEventListener('click', () => this._toggleService());
     this._sessionButton.addEventListener('click', () => this._toggleSession());
+    this._stopAllButton.addEventListener('click', () => this._stopSessions(this._activeSessions));
     this._sessionSelect.addEventListener('change', () => this._sessionSelected());
 
     // Add card to the DOM
     this.appendChild(card);
   }
 
-  // Update the card with current state
+  // Update the card with current state, only the nodes whose state changed are touched
   _updateCard() {
     if (!this._hass || !this._config) {
       return;
     }
 
+    const header = this._deviceExists() ? `DuoStream Control ${this._config.device_name}` : `Invalid Device Name`;
+    if (this._card.header !== header) {
+      this._card.header = header;
+    }
+
     // Update PC status
     const pcState = this._getPcStatus();
-    this._pcStatus.textContent = pcState.charAt(0).toUpperCase() + pcState.slice(1);
+    this._setText(this._pcStatus, pcState.charAt(0).toUpperCase() + pcState.slice(1));
 
     // Update service status
     const serviceState = this._getServiceStatus();
-    this._serviceStatus.textContent = serviceState.charAt(0).toUpperCase() + serviceState.slice(1);
+    this._setText(this._serviceStatus, serviceState.charAt(0).toUpperCase() + serviceState.slice(1));
 
     // Update Wake on LAN button
     const wolState = this._getWakeOnLanStatus();
-    if (wolState === 'on') {
-      this._wakeButton.style.backgroundColor = '#f44336';
-      this._wakeButtonText.textContent = 'Shutdown PC';
-      this._wakeButton.cleanup()
-      this._wakeButton.cleanup = this._addButtonClickEffect(this._serviceButton, {
-        normalColor: '#f44336',  // Couleur normale
-        activeColor: '#d32f2f',  // Couleur quand cliqué
-        disabledColor: '#cccccc' // Couleur quand désactivé
-      });
+    if (wolState !== this._renderedWolState) {
+      this._renderedWolState = wolState;
+      if (wolState === 'on') {
+        this._wakeButton.style.backgroundColor = '#f44336';
+        this._wakeButtonText.textContent = 'Shutdown PC';
+        this._wakeButton.cleanup()
+        this._wakeButton.cleanup = this._addButtonClickEffect(this._wakeButton, {
+          normalColor: '#f44336',  // Couleur normale
+          activeColor: '#d32f2f',  // Couleur quand cliqué
+          disabledColor: '#cccccc' // Couleur quand désactivé
+        });
 
-    } else {
-      this._wakeButton.style.backgroundColor = '#4287f5';
-      this._wakeButtonText.textContent = 'Wake PC';
-      this._wakeButton.cleanup()
-      this._wakeButton.cleanup = this._addButtonClickEffect(this._wakeButton, {
-        normalColor: '#4287f5',  // Couleur normale
-        activeColor: '#3269cc',  // Couleur quand cliqué
-        disabledColor: '#cccccc' // Couleur quand désactivé
-      });
+      } else {
+        this._wakeButton.style.backgroundColor = '#4287f5';
+        this._wakeButtonText.textContent = 'Wake PC';
+        this._wakeButton.cleanup()
+        this._wakeButton.cleanup = this._addButtonClickEffect(this._wakeButton, {
+          normalColor: '#4287f5',  // Couleur normale
+          activeColor: '#3269cc',  // Couleur quand cliqué
+          disabledColor: '#cccccc' // Couleur quand désactivé
+        });
 
+      }
     }
 
     // Update service button
-    if (serviceState === 'running') {
-      this._serviceButton.style.backgroundColor = '#f44336';
-      this._serviceButtonText.textContent = 'Stop Service';
-      this._serviceButton.cleanup()
-      this._serviceButton.cleanup = this._addButtonClickEffect(this._serviceButton, {
-        normalColor: '#f44336',  // Couleur normale
-        activeColor: '#d32f2f',  // Couleur quand cliqué
-        disabledColor: '#cccccc' // Couleur quand désactivé
-      });
+    if (serviceState !== this._renderedServiceState) {
+      this._renderedServiceState = serviceState;
+      if (serviceState === 'running') {
+        this._serviceButton.style.backgroundColor = '#f44336';
+        this._serviceButtonText.textContent = 'Stop Service';
+        this._serviceButton.cleanup()
+        this._serviceButton.cleanup = this._addButtonClickEffect(this._serviceButton, {
+          normalColor: '#f44336',  // Couleur normale
+          activeColor: '#d32f2f',  // Couleur quand cliqué
+          disabledColor: '#cccccc' // Couleur quand désactivé
+        });
 
-    } else {
-      this._serviceButton.style.backgroundColor = '#4caf50';
-      this._serviceButtonText.textContent = 'Start Service';
-      this._serviceButton.cleanup()
-      this._serviceButton.cleanup = this._addButtonClickEffect(this._serviceButton, {
-        normalColor: '#4caf50',
-        activeColor: '#3d8b40',
-        disabledColor: '#cccccc'
-      });
+      } else {
+        this._serviceButton.style.backgroundColor = '#4caf50';
+        this._serviceButtonText.textContent = 'Start Service';
+        this._serviceButton.cleanup()
+        this._serviceButton.cleanup = this._addButtonClickEffect(this._serviceButton, {
+          normalColor: '#4caf50',
+          activeColor: '#3d8b40',
+          disabledColor: '#cccccc'
+        });
 
+      }
     }
 
     // Get all sessions and update UI
@@ -375,7 +476,12 @@ class DuoStreamCard extends HTMLElement {
   // Get service status
   _getServiceStatus() {
     const serviceEntity = this._config.service_entity;
-    return this._hass.states[serviceEntity] ? (this._hass.states[serviceEntity].state === "on" ? "running" : "stopped") : 'unknown';
+    const serviceState = this._hass.states[serviceEntity];
+    // Unavailable until the integration has probed the host, not a stopped service
+    if (!serviceState || serviceState.state === 'unavailable' || serviceState.state === 'unknown') {
+      return 'unknown';
+    }
+    return serviceState.state === "on" ? "running" : "stopped";
   }
 
   // Get Wake on LAN status
@@ -416,18 +522,12 @@ class DuoStreamCard extends HTMLElement {
     // Get all available sessions from sensor
     const allSessions = this._hass.states[sessionsEntity].attributes.available_sessions || [];
 
-    // Clear active sessions container
-    while (this._activeSessionsContainer.firstChild) {
-      this._activeSessionsContainer.removeChild(this._activeSessionsContainer.firstChild);
-    }
-
     // Determine active and inactive sessions
     const activeSessions = [];
     const inactiveSessions = [];
 
     allSessions.forEach(session => {
-      const formattedSession = session.toLowerCase().replaceAll(" ", "_").replaceAll("-", "_");
-      const entityId = `switch.duostream_${this._config.formated_configuration_name}_session_${formattedSession}`;
+      const entityId = this._sessionEntityId(session);
       const state = this._hass.states[entityId] ? this._hass.states[entityId].state : 'off';
 
       if (state === 'on') {
@@ -444,69 +544,112 @@ class DuoStreamCard extends HTMLElement {
     this._updateSessionsDropdown(inactiveSessions);
   }
 
-  // Update active sessions scroll view
+  // Update active sessions scroll view, rows are added, removed or moved but never rebuilt
   _updateActiveSessionsView(activeSessions) {
+    this._activeSessions = activeSessions;
+    this._stopAllButton.style.display = activeSessions.length > 1 ? '' : 'none';
+
+    // Remove the rows of the sessions that stopped
+    this._activeSessionItems.forEach((sessionItem, session) => {
+      if (!activeSessions.includes(session)) {
+        sessionItem.cleanup();
+        sessionItem.remove();
+        this._activeSessionItems.delete(session);
+      }
+    });
+
     if (activeSessions.length === 0) {
-      const noActiveSessions = document.createElement('div');
-      noActiveSessions.textContent = 'No active sessions';
-      noActiveSessions.style.padding = '10px';
-      noActiveSessions.style.textAlign = 'center';
-      noActiveSessions.style.color = this._theme.subtitleColor;
-      this._activeSessionsContainer.appendChild(noActiveSessions);
+      if (this._noActiveSessions.parentNode !== this._activeSessionsContainer) {
+        this._activeSessionsContainer.appendChild(this._noActiveSessions);
+      }
       return;
     }
+    this._noActiveSessions.remove();
+
+    // Add the rows of the sessions that started, in the order of the sessions sensor
+    activeSessions.forEach((session, index) => {
+      let sessionItem = this._activeSessionItems.get(session);
+      if (!sessionItem) {
+        sessionItem = this._createActiveSessionItem(session);
+        this._activeSessionItems.set(session, sessionItem);
+      }
+      const current = this._activeSessionsContainer.children[index];
+      if (current !== sessionItem) {
+        this._activeSessionsContainer.insertBefore(sessionItem, current || null);
+      }
+    });
+  }
 
-    activeSessions.forEach(session => {
-      const sessionItem = document.createElement('div');
-      sessionItem.style.display = 'flex';
-      sessionItem.style.justifyContent = 'space-between';
-      sessionItem.style.alignItems = 'center';
-      sessionItem.style.padding = '10px';
-      sessionItem.style.borderBottom = '1px solid #eee';
-
-      const sessionName = document.createElement('span');
-      sessionName.textContent = session;
-      sessionName.style.color = this._theme.textColor;
-
-      const stopButton = document.createElement('button');
-      stopButton.innerHTML = '&#10005;'; // × symbol
-      stopButton.style.backgroundColor = '#f44336';
-      stopButton.style.color = 'white';
-      stopButton.style.border = 'none';
-      stopButton.style.borderRadius = '50%';
-      stopButton.style.width = '24px';
-      stopButton.style.height = '24px';
-      stopButton.style.cursor = 'pointer';
-      stopButton.style.display = 'flex';
-      stopButton.style.justifyContent = 'center';
-      stopButton.style.alignItems = 'center';
-      stopButton.cleanup = this._addButtonClickEffect(stopButton, {
-        normalColor: '#f44336',
-        activeColor: '#d32f2f',
-        disabledColor: '#cccccc'
-      });
+  // Create the row of an active session
+  _createActiveSessionItem(session) {
+    const sessionItem = document.createElement('div');
+    sessionItem.style.display = 'flex';
+    sessionItem.style.justifyContent = 'space-between';
+    sessionItem.style.alignItems = 'center';
+    sessionItem.style.padding = '10px';
+    sessionItem.style.borderBottom = '1px solid #eee';
+
+    const sessionName = document.createElement('span');
+    sessionName.textContent = session;
+    sessionName.style.color = this._theme.textColor;
+
+    const stopButton = document.createElement('button');
+    stopButton.innerHTML = '&#10005;'; // × symbol
+    stopButton.style.backgroundColor = '#f44336';
+    stopButton.style.color = 'white';
+    stopButton.style.border = 'none';
+    stopButton.style.borderRadius = '50%';
+    stopButton.style.width = '24px';
+    stopButton.style.height = '24px';
+    stopButton.style.cursor = 'pointer';
+    stopButton.style.display = 'flex';
+    stopButton.style.justifyContent = 'center';
+    stopButton.style.alignItems = 'center';
+    stopButton.cleanup = this._addButtonClickEffect(stopButton, {
+      normalColor: '#f44336',
+      activeColor: '#d32f2f',
+      disabledColor: '#cccccc'
+    });
 
-      stopButton.addEventListener('click', () => this._stopSession(session));
-      stopButton.addEventListener('click', () => stopButton.cleanup());
+    stopButton.addEventListener('click', () => this._stopSession(session));
 
-      sessionItem.appendChild(sessionName);
-      sessionItem.appendChild(stopButton);
-      this._activeSessionsContainer.appendChild(sessionItem);
-    });
+    sessionItem.appendChild(sessionName);
+    sessionItem.appendChild(stopButton);
+    sessionItem.cleanup = () => stopButton.cleanup();
+    return sessionItem;
   }
 
   // Stop a specific session
   _stopSession(session) {
-    const formattedSession = session.toLowerCase().replaceAll(" ", "_").replaceAll("-", "_");
-    const entityId = `switch.duostream_${this._config.formated_configuration_name}_session_${formattedSession}`;
+    const entityId = this._sessionEntityId(session);
 
     this._hass.callService('switch', 'turn_off', {
       entity_id: entityId
     });
   }
 
+  // Stop several sessions with one call, the integration runs them concurrently and refreshes once
+  _stopSessions(sessions) {
+    if (!sessions || sessions.length === 0) {
+      return;
+    }
+
+    this._hass.callService('duostream', 'stop_sessions', {
+      configuration_name: this._config.device_name,
+      sessions: sessions
+    });
+  }
+
   // Update available sessions dropdown
   _updateSessionsDropdown(inactiveSessions) {
+    // The options are only rebuilt when the list of inactive sessions changed
+    const renderedSessions = inactiveSessions.join('\n');
+    if (renderedSessions === this._renderedInactiveSessions) {
+      this._updateSessionButton();
+      return;
+    }
+    this._renderedInactiveSessions = renderedSessions;
+
     // Save current selection
     const currentSelection = this._sessionSelect.value;
 
@@ -555,6 +698,12 @@ class DuoStreamCard extends HTMLElement {
     const session = this._sessionSelect.value;
     const serviceState = this._getServiceStatus();
 
+    const renderedButton = `${session}|${serviceState}|${this._sessionSelect.childElementCount}`;
+    if (renderedButton === this._renderedSessionButton) {
+      return;
+    }
+    this._renderedSessionButton = renderedButton;
+
     // If no session is selected or there are no options, disable the button
     if (!session || this._sessionSelect.childElementCount === 0 || serviceState === "stopped") {
       this._sessionButton.disabled = true;
@@ -580,8 +729,7 @@ class DuoStreamCard extends HTMLElement {
       return;
     }
 
-    const formattedSession = session.toLowerCase().replaceAll(" ", "_").replaceAll("-", "_");
-    const entityId = `switch.duostream_${this._config.formated_configuration_name}_session_${formattedSession}`;
+    const entityId = this._sessionEntityId(session);
 
     this._hass.callService('switch', 'turn_on', {
       entity_id: entityId
@@ -602,7 +750,7 @@ class DuoStreamCard extends HTMLElement {
     const settings = {
       activeColor: options.activeColor || '#5e34a0',
       normalColor: options.normalColor || '#673ab7',
-      disabledColor: options.disabledColor || (darkMode ? '#555' : '#cccccc'),
+      disabledColor: options.disabledColor || (this._theme ? this._theme.disabledColor : '#cccccc'),
       scaleAmount: options.scaleAmount || 0.95,
       addShadow: options.addShadow !== undefined ? options.addShadow : true
     };